@@ -1,14 +1,150 @@
+import os
+import io
+import csv
+import json
+import time
+import hmac
+import zlib
 import yaml
 import sqlite3
-from fastapi import FastAPI, Query
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import uvicorn
+from storage import ITEM_COLUMNS, create_storage
+from utils.Logger import configure_logging
+
+
+# 预定义的字段组合，list为列表页实际渲染的字段
+ITEM_FIELD_PRESETS = {
+    'list': ['id', 'title', 'link', 'description', 'pub_date', 'category', 'source_name', 'created_at'],
+    'brief': ['id', 'title', 'link', 'pub_date', 'source_name'],
+    'all': ITEM_COLUMNS,
+}
+
+
+class QueryTimeoutError(Exception):
+    """查询超过配置的超时时间被中断"""
+
+
+class ReadConnectionPool:
+    def __init__(self, db_path: str, pool_size: int = 4, query_timeout: float = 10.0):
+        """
+        只读数据库连接池，查询在独立线程池中执行，不阻塞事件循环
+        
+        Args:
+            db_path: SQLite数据库路径
+            pool_size: 线程池大小，每个线程持有一个只读连接
+            query_timeout: 单次查询超时时间（秒），超时后中断查询
+        """
+        self.db_path = db_path
+        self.query_timeout = query_timeout
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='feedgrep-db')
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+    
+    def _get_connection(self, db_path: Optional[str] = None) -> sqlite3.Connection:
+        """获取当前线程对指定数据库（默认主数据库）的只读连接，不存在时创建"""
+        db_path = db_path or self.db_path
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, timeout=self.query_timeout, check_same_thread=False)
+            conn.execute('PRAGMA query_only = ON')
+            connections[db_path] = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _execute(self, query: str, params: list, db_path: Optional[str] = None) -> List[tuple]:
+        """在工作线程中执行查询，超过截止时间由进度回调中断"""
+        conn = self._get_connection(db_path)
+        deadline = time.monotonic() + self.query_timeout
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            return conn.execute(query, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'interrupted' in str(e):
+                raise QueryTimeoutError(f"查询超时（{self.query_timeout}秒）") from e
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+    
+    async def fetchall(self, query: str, params: Optional[list] = None, db_path: Optional[str] = None) -> List[tuple]:
+        """
+        异步执行查询并返回全部结果
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            db_path: 查询的数据库路径，默认为主数据库，按月分区时为分区路径
+            
+        Returns:
+            元组形式的结果行列表
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._execute, query, params or [], db_path)
+    
+    async def run(self, func, *args):
+        """在数据库线程池中执行会访问数据库文件的同步函数，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def iter_rows(self, query: str, params: Optional[list] = None, chunk_size: int = 1000,
+                        db_path: Optional[str] = None) -> AsyncIterator[List[tuple]]:
+        """
+        使用独立连接和服务端游标分批读取查询结果，内存占用与结果总量无关
+        
+        导出类长查询不受query_timeout限制
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            chunk_size: 每批读取的行数
+            db_path: 查询的数据库路径，默认为主数据库
+            
+        Yields:
+            每批结果行
+        """
+        loop = asyncio.get_running_loop()
+        
+        def open_cursor():
+            conn = sqlite3.connect(db_path or self.db_path, timeout=self.query_timeout, check_same_thread=False)
+            conn.execute('PRAGMA query_only = ON')
+            return conn, conn.execute(query, params or [])
+        
+        conn, cursor = await loop.run_in_executor(self.executor, open_cursor)
+        try:
+            while True:
+                rows = await loop.run_in_executor(self.executor, cursor.fetchmany, chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # 客户端断开时生成器被取消，直接关闭连接
+            conn.close()
+    
+    def close(self):
+        """关闭线程池和所有连接"""
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
 
 
 class FeedGrepAPI:
+    # 配置文件变更检查间隔（秒）
+    CONFIG_WATCH_INTERVAL = 10
+    
     def __init__(self, config_path: str, db_path: str = "feedgrep.db"):
         """
         初始化FeedGrep API服务
@@ -18,10 +154,26 @@ class FeedGrepAPI:
             db_path: SQLite数据库路径
         """
         # 加载配置文件
+        self.config_path = config_path
+        self.config_mtime = os.path.getmtime(config_path)
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
+        configure_logging(self.config.get('logging'))
+        self._config_watch_task = None
+        self._backup_manager = None
         
         self.db_path = db_path
+        # 条目存储后端，决定每个查询需要访问哪些分区
+        self.storage = create_storage(self.config, db_path)
+        
+        # 初始化只读连接池，数据库查询不在事件循环中执行
+        api_config = self.config.get('api', {}) or {}
+        self.db = ReadConnectionPool(
+            db_path,
+            pool_size=api_config.get('db_pool_size', 4),
+            query_timeout=api_config.get('query_timeout', 10)
+        )
+        
         self.app = FastAPI(
             title="FeedGrep API",
             description="RSS聚合器API服务",
@@ -38,49 +190,201 @@ class FeedGrepAPI:
         )
         
         self._setup_routes()
+        self.app.add_event_handler("startup", self._start_config_watch)
+        self.app.add_event_handler("shutdown", self._stop_config_watch)
+        self.app.add_event_handler("shutdown", self.db.close)
         
         # 挂载静态文件目录，提供index.html和其他静态资源
         # 注意：这必须在设置路由之后，以避免拦截API请求
         self.app.mount("/", StaticFiles(directory=".", html=True), name="static")
     
+    @staticmethod
+    def _parse_fields(fields: Optional[str]) -> List[str]:
+        """
+        解析fields参数为需要查询的列
+        
+        Args:
+            fields: 逗号分隔的列名，或预定义组合名（list/brief/all）
+            
+        Returns:
+            去重后的列名列表，id总是包含在内
+        """
+        if not fields:
+            fields = 'list'
+        
+        columns = []
+        for name in fields.split(','):
+            name = name.strip()
+            if not name:
+                continue
+            if name in ITEM_FIELD_PRESETS:
+                columns.extend(ITEM_FIELD_PRESETS[name])
+            elif name in ITEM_COLUMNS:
+                columns.append(name)
+            else:
+                raise ValueError(f"未知字段: {name}")
+        
+        if 'id' not in columns:
+            columns.insert(0, 'id')
+        # 去重并保持顺序
+        return list(dict.fromkeys(columns))
+    
+    async def _fetch_item_rows(self, columns: List[str], limit: int, offset: int = 0, **filters) -> List[tuple]:
+        """
+        按存储后端的查询计划逐个分区查询并合并结果，取够offset+limit条后不再访问更早的分区；
+        按ID排序时各分区的ID范围可能交叠，查询全部分区后按ID排序
+        
+        Args:
+            columns: 查询的列
+            limit: 返回数量限制
+            offset: 偏移量
+            filters: build_item_query的筛选和排序参数
+            
+        Returns:
+            元组形式的结果行列表
+        """
+        # 生成计划时会列出和打开分区文件，在线程池中执行
+        plan = await self.db.run(lambda: self.storage.query_plan(columns, limit, offset, **filters))
+        by_id = filters.get('order') == 'id'
+        rows = []
+        for path, query, params in plan:
+            if not by_id and len(rows) >= limit + offset:
+                break
+            rows.extend(await self.db.fetchall(query, params, db_path=path))
+        if by_id:
+            id_index = columns.index('id')
+            rows.sort(key=lambda row: row[id_index])
+        return rows[offset:offset + limit]
+    
+    @staticmethod
+    def _build_rows_response(columns: List[str], rows: List[tuple], fmt: str) -> Dict:
+        """
+        按指定格式组装查询结果
+        
+        Args:
+            columns: 查询的列名
+            rows: 查询返回的元组行
+            fmt: rows为每行一个对象，columns为列名加二维数组，避免每行重复键名
+            
+        Returns:
+            响应字典
+        """
+        if fmt == 'columns':
+            return {
+                'success': True,
+                'fields': columns,
+                'data': [list(row) for row in rows],
+                'count': len(rows)
+            }
+        
+        return {
+            'success': True,
+            'data': [dict(zip(columns, row)) for row in rows],
+            'count': len(rows)
+        }
+    
+    @staticmethod
+    def _error_response(e: Exception) -> JSONResponse:
+        """将查询异常转换为错误响应，查询超时返回504"""
+        return JSONResponse(
+            status_code=504 if isinstance(e, QueryTimeoutError) else 500,
+            content={
+                'success': False,
+                'error': str(e)
+            }
+        )
+    
     def _setup_routes(self):
         """设置API路由"""
         self.app.get("/api/feeds", response_model=dict)(self.get_feeds)
         self.app.get("/api/items", response_model=dict)(self.get_items)
         self.app.get("/api/categories", response_model=dict)(self.get_categories)
+        self.app.get("/api/feed_health", response_model=dict)(self.get_feed_health)
+        self.app.get("/api/batches", response_model=dict)(self.get_batches)
+        self.app.get("/api/trending", response_model=dict)(self.get_trending)
         self.app.get("/api/search", response_model=dict)(self.search_items)
+        self.app.get("/api/export")(self.export_items)
         self.app.get("/api/default_keywords", response_model=dict)(self.get_default_keywords)
+        self.app.post("/api/reload", response_model=dict)(self.reload)
+        self.app.post("/api/admin/backup", response_model=dict)(self.create_backup)
+        self.app.get("/api/admin/backups", response_model=dict)(self.list_backups)
         self.app.get("/health", response_model=dict)(self.health_check)
     
-    async def get_feeds(self):
+    async def _get_facet_counts(self, facet_type: str, since_batch: Optional[int]) -> Dict[str, dict]:
+        """
+        从预先计算的计数器表读取分类或来源的条目数，不扫描条目表
+        
+        Args:
+            facet_type: category或source
+            since_batch: 统计batch_id大于该值的新条目数，为空时不统计
+            
+        Returns:
+            以分类或来源名称为键的计数，包括total、last_24h，指定since_batch时包括unread
+        """
+        counts = {}
+        rows = await self.db.fetchall(
+            "SELECT facet_value, total FROM feedgrep_facet_totals WHERE facet_type = ?",
+            [facet_type]
+        )
+        for value, total in rows:
+            counts[value] = {'total': total, 'last_24h': 0}
+            if since_batch is not None:
+                counts[value]['unread'] = 0
+        
+        rows = await self.db.fetchall(
+            "SELECT facet_value, SUM(count) FROM feedgrep_facet_buckets WHERE facet_type = ? AND hour > ? GROUP BY facet_value",
+            [facet_type, int(time.time() // 3600) - 24]
+        )
+        for value, count in rows:
+            if value in counts:
+                counts[value]['last_24h'] = count
+        
+        if since_batch is not None:
+            rows = await self.db.fetchall(
+                "SELECT facet_value, SUM(count) FROM feedgrep_facet_buckets WHERE facet_type = ? AND batch_id > ? GROUP BY facet_value",
+                [facet_type, since_batch]
+            )
+            for value, count in rows:
+                if value in counts:
+                    counts[value]['unread'] = count
+        return counts
+    
+    async def get_feeds(
+        self,
+        since_batch: Optional[int] = Query(None, ge=0, description="统计batch_id大于该值的未读条目数")
+    ):
         """
         获取所有RSS源和分类信息
         
+        查询参数:
+            since_batch: 可选，指定后counts中包含各RSS源的未读条目数
+        
         Returns:
-            JSON格式的所有RSS源和分类信息
+            JSON格式的所有RSS源和分类信息，counts为按RSS源名称统计的条目数
         """
         try:
             categories_data = self.config.get('categories', {})
             return {
                 'success': True,
                 'data': categories_data,
-                'count': sum(len(feeds) for feeds in categories_data.values())
+                'count': sum(len(feeds) for feeds in categories_data.values()),
+                'counts': await self._get_facet_counts('source', since_batch)
             }
         except Exception as e:
-            return JSONResponse(
-                status_code=500,
-                content={
-                    'success': False,
-                    'error': str(e)
-                }
-            )
+            return self._error_response(e)
     
-    async def get_categories(self):
+    async def get_categories(
+        self,
+        since_batch: Optional[int] = Query(None, ge=0, description="统计batch_id大于该值的未读条目数")
+    ):
         """
         获取所有分类信息
         
+        查询参数:
+            since_batch: 可选，指定后counts中包含各分类的未读条目数
+        
         Returns:
-            JSON格式的所有分类信息
+            JSON格式的所有分类信息，counts为按分类统计的条目数
         """
         try:
             categories_data = self.config.get('categories', {})
@@ -88,16 +392,139 @@ class FeedGrepAPI:
             return {
                 'success': True,
                 'data': categories,
-                'count': len(categories)
+                'count': len(categories),
+                'counts': await self._get_facet_counts('category', since_batch)
             }
         except Exception as e:
-            return JSONResponse(
-                status_code=500,
-                content={
-                    'success': False,
-                    'error': str(e)
-                }
+            return self._error_response(e)
+    
+    async def get_feed_health(
+        self,
+        state: Optional[str] = Query(None, pattern='^(closed|open|half_open)$', description="按熔断状态筛选")
+    ):
+        """
+        获取RSS源健康状态
+        
+        查询参数:
+            state: 熔断状态筛选，closed/open/half_open
+            
+        Returns:
+            JSON格式的RSS源健康状态，包括连续失败次数、延迟和熔断恢复时间
+        """
+        columns = ['source_name', 'state', 'consecutive_failures', 'total_successes', 'total_failures',
+                   'last_latency_ms', 'avg_latency_ms', 'last_error', 'last_success_at', 'last_failure_at',
+                   'open_until']
+        try:
+            query = f"SELECT {', '.join(columns)} FROM feedgrep_feed_health"
+            params = []
+            if state:
+                query += " WHERE state = ?"
+                params.append(state)
+            query += " ORDER BY consecutive_failures DESC, source_name"
+            
+            rows = await self.db.fetchall(query, params)
+            return self._build_rows_response(columns, rows, 'rows')
+        except Exception as e:
+            return self._error_response(e)
+    
+    async def get_batches(
+        self,
+        since_batch: int = Query(0, ge=0, description="只返回batch_id大于该值的批次"),
+        limit: int = Query(50, ge=1, le=1000, description="返回数量限制")
+    ):
+        """
+        获取抓取批次记录，按batch_id升序
+        
+        查询参数:
+            since_batch: 增量同步，返回batch_id大于该值的批次
+            limit: 返回数量限制，默认50，最大1000
+            
+        Returns:
+            JSON格式的批次记录，包括起止时间、各RSS源新条目数、错误及条目ID范围
+        """
+        columns = ['batch_id', 'owner', 'status', 'started_at', 'finished_at', 'feeds_processed',
+                   'items_saved', 'first_item_id', 'last_item_id', 'feed_counts', 'errors']
+        try:
+            rows = await self.db.fetchall(
+                f"SELECT {', '.join(columns)} FROM feedgrep_ingest_runs WHERE batch_id > ? ORDER BY batch_id LIMIT ?",
+                [since_batch, limit]
             )
+            batches = []
+            for row in rows:
+                batch = dict(zip(columns, row))
+                batch['feed_counts'] = json.loads(batch['feed_counts']) if batch['feed_counts'] else {}
+                batch['errors'] = json.loads(batch['errors']) if batch['errors'] else []
+                batches.append(batch)
+            return {
+                'success': True,
+                'data': batches,
+                'count': len(batches),
+                'next_since_batch': batches[-1]['batch_id'] if batches else since_batch
+            }
+        except Exception as e:
+            return self._error_response(e)
+    
+    async def get_trending(
+        self,
+        window_hours: Optional[int] = Query(None, ge=1, le=168, description="统计最近多少小时内上升的词"),
+        baseline_hours: Optional[int] = Query(None, ge=1, le=720, description="统计窗口之前用于对比的基线时长"),
+        min_count: Optional[int] = Query(None, ge=1, description="窗口内至少出现的次数"),
+        limit: int = Query(20, ge=1, le=200, description="返回数量限制")
+    ):
+        """
+        获取最近上升最快的热词
+        
+        只聚合按小时分桶的词频表，不扫描条目标题。上升幅度为窗口内出现次数与
+        按基线期频率折算到窗口时长的期望次数之比（均加1平滑），基线期没有出现过的新词排在前面
+        
+        查询参数:
+            window_hours: 统计窗口，默认取配置trending.window_hours
+            baseline_hours: 基线时长，默认取配置trending.baseline_hours
+            min_count: 最少出现次数，默认取配置trending.min_count
+            limit: 返回数量限制，默认20，最大200
+            
+        Returns:
+            JSON格式的热词列表，包括窗口内次数、基线期次数、期望次数和上升幅度
+        """
+        trending_config = self.config.get('trending', {}) or {}
+        window_hours = window_hours or trending_config.get('window_hours', 6)
+        baseline_hours = baseline_hours or trending_config.get('baseline_hours', 72)
+        min_count = min_count or trending_config.get('min_count', 3)
+        
+        # 当前小时计入窗口，窗口之前的baseline_hours小时为基线期
+        window_start = int(time.time() // 3600) - window_hours + 1
+        baseline_start = window_start - baseline_hours
+        scale = window_hours / baseline_hours
+        try:
+            rows = await self.db.fetchall('''
+                SELECT term, current, baseline, baseline * ? AS expected,
+                       (current + 1.0) / (baseline * ? + 1.0) AS score
+                FROM (
+                    SELECT term,
+                           SUM(CASE WHEN hour >= ? THEN count ELSE 0 END) AS current,
+                           SUM(CASE WHEN hour < ? THEN count ELSE 0 END) AS baseline
+                    FROM feedgrep_term_buckets
+                    WHERE hour >= ?
+                    GROUP BY term
+                )
+                WHERE current >= ?
+                ORDER BY score DESC, current DESC
+                LIMIT ?
+            ''', [scale, scale, window_start, window_start, baseline_start, min_count, limit])
+            columns = ['term', 'count', 'baseline_count', 'expected', 'score']
+            terms = [dict(zip(columns, row)) for row in rows]
+            for term in terms:
+                term['expected'] = round(term['expected'], 2)
+                term['score'] = round(term['score'], 2)
+            return {
+                'success': True,
+                'data': terms,
+                'count': len(terms),
+                'window_hours': window_hours,
+                'baseline_hours': baseline_hours
+            }
+        except Exception as e:
+            return self._error_response(e)
     
     async def get_default_keywords(self):
         """
@@ -137,8 +564,14 @@ class FeedGrepAPI:
         category: Optional[str] = Query(None, description="按分类筛选"),
         source: Optional[str] = Query(None, description="按来源筛选"),
         keyword: Optional[str] = Query(None, description="关键字搜索"),
+        since_id: Optional[int] = Query(None, ge=0, description="只返回ID大于该值的条目，按ID升序，用于增量同步"),
+        after_id: Optional[int] = Query(None, ge=0, description="只返回ID大于该值的条目，按时间倒序，用于客户端缓存补齐新条目"),
+        cluster_id: Optional[int] = Query(None, description="只返回指定聚类中的条目"),
+        collapse: bool = Query(False, description="合并近似重复条目，每个聚类只返回首条"),
         limit: int = Query(10, ge=1, le=1000, description="返回数量限制"),
-        offset: int = Query(0, ge=0, description="偏移量")
+        offset: int = Query(0, ge=0, description="偏移量"),
+        fields: Optional[str] = Query(None, description="返回字段，逗号分隔或list/brief/all"),
+        format: str = Query('rows', pattern='^(rows|columns)$', description="返回格式：rows或columns")
     ):
         """
         从数据库获取RSS条目，支持查询参数
@@ -147,91 +580,129 @@ class FeedGrepAPI:
             category: 分类筛选
             source: 来源筛选
             keyword: 关键字搜索
+            since_id: 增量同步，返回ID大于since_id的条目（按ID升序），响应中的next_since_id用于下次请求
+            after_id: 返回ID大于after_id的条目，排序与普通列表相同，不能与since_id同时使用
+            cluster_id: 聚类筛选，用于展开被合并的条目
+            collapse: 合并近似重复条目，返回结果附带cluster_size
             limit: 返回数量限制，默认50，最大1000
             offset: 偏移量，默认0
+            fields: 返回字段，默认list（列表页所需字段）
+            format: rows返回对象列表，columns返回列名和二维数组
             
         Returns:
             JSON格式的RSS条目数据
         """
         try:
-            # 构建查询语句
-            query = "SELECT * FROM feedgrep_items WHERE 1=1"
-            params = []
-            
-            if category:
-                query += " AND category = ?"
-                params.append(category)
-            
-            if source:
-                query += " AND source_name = ?"
-                params.append(source)
-                
-            if keyword:
-                # 解析关键词语法
-                # 普通词：包含其中任意一个词就会被捕获，多个关键词使用空格分隔
-                # 必须词：必须同时包含普通词和必须词才会被捕获，使用+分隔  
-                # 排除词：包含过滤词的新闻会被直接排除，即使包含关键词，使用-分隔
-                
-                required_keywords = []  # 必须包含的关键词 (+)
-                excluded_keywords = []  # 必须排除的关键词 (-)
-                normal_keywords = []    # 普通关键词 (空格分隔)
-                
-                # 解析关键词
-                parts = keyword.split()
-                for part in parts:
-                    if part.startswith('+'):
-                        required_keywords.append(part[1:])  # 去掉+号
-                    elif part.startswith('-'):
-                        excluded_keywords.append(part[1:])  # 去掉-号
-                    else:
-                        normal_keywords.append(part)
-                
-                # 处理普通关键词 (OR关系)
-                if normal_keywords:
-                    or_conditions = []
-                    for kw in normal_keywords:
-                        or_conditions.append("(title LIKE ? OR description LIKE ?)")
-                        params.extend([f"%{kw}%", f"%{kw}%"])
-                    query += " AND (" + " OR ".join(or_conditions) + ")"
-                
-                # 处理必须关键词 (AND关系)
-                for kw in required_keywords:
-                    query += " AND (title LIKE ? OR description LIKE ?)"
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                
-                # 处理排除关键词
-                for kw in excluded_keywords:
-                    query += " AND (title NOT LIKE ? AND description NOT LIKE ?)"
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            # 执行查询
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            # 获取结果
-            rows = cursor.fetchall()
-            items = [dict(row) for row in rows]
-            
-            conn.close()
+            columns = self._parse_fields(fields)
+            if since_id is not None and after_id is not None:
+                raise ValueError("since_id和after_id不能同时使用")
+        except ValueError as e:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+        
+        try:
+            # 增量同步按主键范围扫描；since_id和after_id都只访问包含新条目的分区
+            rows = await self._fetch_item_rows(
+                columns, limit, offset,
+                category=category, source=source, keyword=keyword,
+                since_id=since_id if since_id is not None else after_id,
+                cluster_id=cluster_id, collapse=collapse, order='id' if since_id is not None else 'newest'
+            )
+            if collapse:
+                columns = columns + ['cluster_size']
             
-            return {
-                'success': True,
-                'data': items,
-                'count': len(items)
-            }
+            result = self._build_rows_response(columns, rows, format)
+            if since_id is not None:
+                result['next_since_id'] = rows[-1][columns.index('id')] if rows else since_id
+            return result
         except Exception as e:
+            return self._error_response(e)
+    
+    async def export_items(
+        self,
+        format: str = Query('ndjson', pattern='^(ndjson|csv)$', description="导出格式：ndjson或csv"),
+        gzip: bool = Query(False, description="是否gzip压缩"),
+        category: Optional[str] = Query(None, description="按分类筛选"),
+        source: Optional[str] = Query(None, description="按来源筛选"),
+        keyword: Optional[str] = Query(None, description="关键字搜索"),
+        since: Optional[str] = Query(None, description="只导出该时间之后入库的条目，如2025-01-01或2025-01-01T08:00:00"),
+        fields: Optional[str] = Query('all', description="导出字段，逗号分隔或list/brief/all")
+    ):
+        """
+        流式导出RSS条目，不限制条数
+        
+        查询参数:
+            format: ndjson每行一个JSON对象，csv带表头
+            gzip: 为true时输出gzip压缩文件
+            category: 分类筛选
+            source: 来源筛选
+            keyword: 关键字搜索，语法同/api/items
+            since: 入库时间下限（UTC）
+            fields: 导出字段，默认全部
+            
+        Returns:
+            分块传输的导出文件
+        """
+        try:
+            columns = self._parse_fields(fields)
+        except ValueError as e:
             return JSONResponse(
-                status_code=500,
+                status_code=400,
                 content={
                     'success': False,
                     'error': str(e)
                 }
             )
+        
+        # 逐个分区按主键顺序扫描，结果稳定
+        plan = await self.db.run(lambda: self.storage.query_plan(
+            columns, category=category, source=source, keyword=keyword, since=since, order='id'))
+        
+        async def generate():
+            compressor = zlib.compressobj(wbits=31) if gzip else None
+            
+            def encode(text: str) -> bytes:
+                data = text.encode('utf-8')
+                return compressor.compress(data) if compressor else data
+            
+            if format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                yield encode(buffer.getvalue())
+            
+            for path, query, params in plan:
+                async for rows in self.db.iter_rows(query, params, db_path=path):
+                    if format == 'csv':
+                        buffer = io.StringIO()
+                        csv.writer(buffer).writerows(rows)
+                        chunk = buffer.getvalue()
+                    else:
+                        chunk = ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+                    data = encode(chunk)
+                    if data:
+                        yield data
+            
+            if compressor:
+                yield compressor.flush()
+        
+        filename = f"feedgrep_export.{format}" + ('.gz' if gzip else '')
+        if gzip:
+            media_type = 'application/gzip'
+        elif format == 'csv':
+            media_type = 'text/csv; charset=utf-8'
+        else:
+            media_type = 'application/x-ndjson'
+        return StreamingResponse(
+            generate(),
+            media_type=media_type,
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
     
     async def search_items(
         self,
@@ -239,7 +710,9 @@ class FeedGrepAPI:
         category: Optional[str] = Query(None, description="按分类筛选"),
         source: Optional[str] = Query(None, description="按来源筛选"),
         limit: int = Query(50, ge=1, le=1000, description="返回数量限制"),
-        offset: int = Query(0, ge=0, description="偏移量")
+        offset: int = Query(0, ge=0, description="偏移量"),
+        fields: Optional[str] = Query(None, description="返回字段，逗号分隔或list/brief/all"),
+        format: str = Query('rows', pattern='^(rows|columns)$', description="返回格式：rows或columns")
     ):
         """
         搜索RSS条目
@@ -250,88 +723,75 @@ class FeedGrepAPI:
             source: 来源筛选
             limit: 返回数量限制，默认50，最大1000
             offset: 偏移量，默认0
+            fields: 返回字段，默认list（列表页所需字段）
+            format: rows返回对象列表，columns返回列名和二维数组
             
         Returns:
             JSON格式的RSS条目数据
         """
         try:
-            # 解析关键词语法
-            # 普通词：包含其中任意一个词就会被捕获，多个关键词使用空格分隔
-            # 必须词：必须同时包含普通词和必须词才会被捕获，使用+分隔  
-            # 排除词：包含过滤词的新闻会被直接排除，即使包含关键词，使用-分隔
-            
-            required_keywords = []  # 必须包含的关键词 (+)
-            excluded_keywords = []  # 必须排除的关键词 (-)
-            normal_keywords = []    # 普通关键词 (空格分隔)
-            
-            # 解析关键词
-            parts = keyword.split()
-            for part in parts:
-                if part.startswith('+'):
-                    required_keywords.append(part[1:])  # 去掉+号
-                elif part.startswith('-'):
-                    excluded_keywords.append(part[1:])  # 去掉-号
-                else:
-                    normal_keywords.append(part)
-            
-            # 构建查询语句
-            query_conditions = []
-            params = []
-            
-            # 处理普通关键词 (OR关系)
-            if normal_keywords:
-                or_conditions = []
-                for kw in normal_keywords:
-                    or_conditions.append("(title LIKE ? OR description LIKE ?)")
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                query_conditions.append("(" + " OR ".join(or_conditions) + ")")
-            
-            # 处理必须关键词 (AND关系)
-            for kw in required_keywords:
-                query_conditions.append("(title LIKE ? OR description LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            # 处理排除关键词
-            for kw in excluded_keywords:
-                query_conditions.append("(title NOT LIKE ? AND description NOT LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            # 基础查询
-            query = "SELECT * FROM feedgrep_items WHERE "
-            if query_conditions:
-                query += " AND ".join(query_conditions)
-            else:
-                query += "1=1"  # 没有条件时的占位符
-            
-            # 添加分类和来源筛选条件
-            if category:
-                query += " AND category = ?"
-                params.append(category)
-            
-            if source:
-                query += " AND source_name = ?"
-                params.append(source)
-            
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            # 执行查询
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            # 获取结果
-            rows = cursor.fetchall()
-            items = [dict(row) for row in rows]
-            
-            conn.close()
+            columns = self._parse_fields(fields)
+        except ValueError as e:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+        
+        try:
+            rows = await self._fetch_item_rows(
+                columns, limit, offset, category=category, source=source, keyword=keyword
+            )
             
+            result = self._build_rows_response(columns, rows, format)
+            result['keyword'] = keyword
+            return result
+        except Exception as e:
+            return self._error_response(e)
+    
+    def reload_config(self):
+        """重新加载配置文件，RSS源、分类和默认关键词接口随之更新"""
+        mtime = os.path.getmtime(self.config_path)
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            self.config = yaml.safe_load(f)
+        self.config_mtime = mtime
+        configure_logging(self.config.get('logging'))
+        self._backup_manager = None
+    
+    async def _watch_config(self):
+        """定期检查配置文件修改时间，变化后自动重新加载"""
+        while True:
+            await asyncio.sleep(self.CONFIG_WATCH_INTERVAL)
+            try:
+                if os.path.getmtime(self.config_path) != self.config_mtime:
+                    self.reload_config()
+            except Exception:
+                # 配置有误时保留原配置，下次修改后再尝试
+                self.config_mtime = os.path.getmtime(self.config_path)
+    
+    async def _start_config_watch(self):
+        self._config_watch_task = asyncio.create_task(self._watch_config())
+    
+    async def _stop_config_watch(self):
+        if self._config_watch_task:
+            self._config_watch_task.cancel()
+    
+    async def reload(self):
+        """
+        立即重新加载配置文件
+        
+        Returns:
+            重新加载后的RSS源和关键词数量
+        """
+        try:
+            self.reload_config()
+            categories_data = self.config.get('categories', {})
             return {
                 'success': True,
-                'data': items,
-                'count': len(items),
-                'keyword': keyword
+                'feeds': sum(len(feeds) for feeds in categories_data.values()),
+                'keywords': len(self.config.get('default_keywords', []))
             }
         except Exception as e:
             return JSONResponse(
@@ -342,6 +802,93 @@ class FeedGrepAPI:
                 }
             )
     
+    def _check_admin(self, request: Request) -> Optional[JSONResponse]:
+        """
+        校验管理接口的访问令牌
+        
+        Args:
+            request: 当前请求，令牌通过 Authorization: Bearer <令牌> 传递
+            
+        Returns:
+            校验通过返回None；未配置api.admin_token时返回403，令牌错误时返回401
+        """
+        admin_token = str((self.config.get('api', {}) or {}).get('admin_token') or '')
+        if not admin_token:
+            return JSONResponse(
+                status_code=403,
+                content={
+                    'success': False,
+                    'error': '管理接口未启用，请在配置中设置api.admin_token'
+                }
+            )
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), admin_token.encode()):
+            return JSONResponse(
+                status_code=401,
+                content={
+                    'success': False,
+                    'error': '管理接口令牌无效'
+                }
+            )
+        return None
+    
+    @property
+    def backup_manager(self):
+        """备份管理器，首次使用时创建"""
+        if self._backup_manager is None:
+            from backup import BackupManager
+            self._backup_manager = BackupManager(self.config, self.db_path)
+        return self._backup_manager
+    
+    async def create_backup(self, request: Request):
+        """
+        立即在线备份数据库，备份期间抓取和查询不受影响，需要管理令牌
+        
+        Returns:
+            新快照的清单，已有备份在进行时返回409
+        """
+        from backup import BackupInProgressError
+        denied = self._check_admin(request)
+        if denied is not None:
+            return denied
+        try:
+            loop = asyncio.get_running_loop()
+            manifest = await loop.run_in_executor(None, self.backup_manager.create_backup)
+            return {
+                'success': True,
+                'data': manifest
+            }
+        except BackupInProgressError as e:
+            return JSONResponse(
+                status_code=409,
+                content={
+                    'success': False,
+                    'error': str(e)
+                }
+            )
+        except Exception as e:
+            return self._error_response(e)
+    
+    async def list_backups(self, request: Request):
+        """
+        列出已有的备份快照，需要管理令牌
+        
+        Returns:
+            JSON格式的快照清单，最新的在前
+        """
+        denied = self._check_admin(request)
+        if denied is not None:
+            return denied
+        try:
+            backups = self.backup_manager.list_backups()
+            return {
+                'success': True,
+                'data': backups,
+                'count': len(backups)
+            }
+        except Exception as e:
+            return self._error_response(e)
+    
     async def health_check(self):
         """
         健康检查接口
@@ -354,13 +901,37 @@ class FeedGrepAPI:
             'service': 'FeedGrep API'
         }
     
-    def run(self, host='127.0.0.1', port=8000, **kwargs):
+    def run(self, host='127.0.0.1', port=8000, workers: Optional[int] = None, **kwargs):
         """
         通过uvicorn启动API服务
         
         Args:
             host: 监听主机地址
             port: 监听端口
+            workers: uvicorn worker进程数，默认读取配置api.workers
             **kwargs: 传递给uvicorn的其他参数
         """
-        uvicorn.run(self.app, host=host, port=port, **kwargs)
\ No newline at end of file
+        if workers is None:
+            workers = (self.config.get('api', {}) or {}).get('workers', 1)
+        
+        if workers > 1:
+            # 多进程模式下uvicorn需要通过导入路径创建应用，配置通过环境变量传给各worker
+            os.environ['FEEDGREP_CONFIG'] = os.path.abspath(self.config_path)
+            os.environ['FEEDGREP_DB'] = os.path.abspath(self.db_path)
+            uvicorn.run("api:create_app", factory=True, host=host, port=port, workers=workers, **kwargs)
+        else:
+            uvicorn.run(self.app, host=host, port=port, **kwargs)
+
+
+def create_app() -> FastAPI:
+    """
+    uvicorn应用工厂，供多worker模式使用
+    
+    配置文件和数据库路径分别读取环境变量FEEDGREP_CONFIG和FEEDGREP_DB
+    
+    Returns:
+        FastAPI应用实例
+    """
+    config_path = os.environ.get('FEEDGREP_CONFIG', 'feedgrep.yaml')
+    db_path = os.environ.get('FEEDGREP_DB', 'feedgrep.db')
+    return FeedGrepAPI(config_path, db_path).app
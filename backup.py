@@ -0,0 +1,249 @@
+import os
+import json
+import gzip
+import time
+import shutil
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+from storage import create_storage
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+
+class BackupInProgressError(Exception):
+    """已有备份正在进行"""
+
+
+class _BackupRestartedError(Exception):
+    """在线备份因源数据库被写入而反复重新开始"""
+
+
+class BackupManager:
+    # 快照清单文件名，写入清单后快照才算完成
+    MANIFEST = 'manifest.json'
+    # 同一进程内的备份互斥，重新加载配置后新建的实例同样生效
+    _lock = threading.Lock()
+
+    def __init__(self, config: Dict, db_path: str = "feedgrep.db"):
+        """
+        在线备份和恢复，备份期间抓取和API可以继续读写数据库
+
+        每次备份生成一个快照目录，包含主数据库和全部条目分区的副本以及清单文件
+
+        Args:
+            config: 完整配置，读取backup段
+            db_path: 主数据库路径
+        """
+        backup_config = config.get('backup', {}) or {}
+        self.db_path = db_path
+        self.storage = create_storage(config, db_path)
+        self.backup_dir = backup_config.get('dir', 'backups')
+        self.method = backup_config.get('method', 'vacuum')
+        self.pages_per_step = backup_config.get('pages_per_step', 1024)
+        self.step_sleep = backup_config.get('step_sleep', 0.05)
+        self.max_restarts = backup_config.get('max_restarts', 3)
+        self.compress = backup_config.get('compress', True)
+        self.retention = backup_config.get('retention', 7)
+
+    def _snapshot_database(self, src_path: str, dst_path: str):
+        """
+        生成单个数据库的一致性副本
+
+        vacuum：VACUUM INTO在一个读事务中写出紧凑副本，WAL模式下不阻塞写入；
+        backup：在线备份API每次复制pages_per_step页后释放锁并等待step_sleep秒，
+        写入者最多等待一步的时间。其他连接在复制期间写入时备份会从头开始，
+        持续抓取时可能一直无法完成，重新开始超过max_restarts次后改用VACUUM INTO
+        """
+        src = sqlite3.connect(src_path, timeout=20.0)
+        try:
+            if self.method == 'backup':
+                try:
+                    self._step_backup(src, dst_path)
+                    return
+                except _BackupRestartedError:
+                    log.warning(f"Backup of {src_path} restarted more than {self.max_restarts} times "
+                                f"under concurrent writes, falling back to VACUUM INTO")
+                    os.remove(dst_path)
+            src.execute('VACUUM INTO ?', (dst_path,))
+        finally:
+            src.close()
+
+    def _step_backup(self, src: sqlite3.Connection, dst_path: str):
+        """分步复制数据库，剩余页数回升说明备份已重新开始，超过max_restarts次时抛出_BackupRestartedError"""
+        state = {'remaining': None, 'restarts': 0}
+
+        def progress(status, remaining, total):
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > self.max_restarts:
+                    raise _BackupRestartedError()
+            state['remaining'] = remaining
+
+        dst = sqlite3.connect(dst_path)
+        try:
+            src.backup(dst, pages=self.pages_per_step, progress=progress, sleep=self.step_sleep)
+        finally:
+            dst.close()
+
+    def create_backup(self) -> Dict:
+        """
+        备份全部数据库文件，完成后按保留数量清理旧快照
+
+        Returns:
+            快照清单，包括快照名称、创建时间和各文件大小
+
+        Raises:
+            BackupInProgressError: 已有备份正在进行
+        """
+        if not self._lock.acquire(blocking=False):
+            raise BackupInProgressError("已有备份正在进行")
+        try:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            name = time.strftime('feedgrep-%Y%m%d-%H%M%S')
+            suffix = 1
+            while os.path.exists(os.path.join(self.backup_dir, name)):
+                suffix += 1
+                name = time.strftime('feedgrep-%Y%m%d-%H%M%S') + f"-{suffix}"
+
+            # 先写入临时目录，全部完成后重命名，未完成的快照不会被列出或恢复
+            tmp_dir = os.path.join(self.backup_dir, name + '.tmp')
+            os.makedirs(tmp_dir)
+            start_time = time.perf_counter()
+            try:
+                files = []
+                for path in self.storage.database_files():
+                    filename = os.path.basename(path)
+                    snapshot_path = os.path.join(tmp_dir, filename)
+                    self._snapshot_database(path, snapshot_path)
+                    # 压缩在副本上进行，不占用数据库
+                    if self.compress:
+                        with open(snapshot_path, 'rb') as src, gzip.open(snapshot_path + '.gz', 'wb') as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+                        os.remove(snapshot_path)
+                        snapshot_path += '.gz'
+                    files.append({
+                        'database': filename,
+                        'file': os.path.basename(snapshot_path),
+                        'size': os.path.getsize(snapshot_path)
+                    })
+
+                manifest = {
+                    'name': name,
+                    'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'method': self.method,
+                    'compressed': self.compress,
+                    'files': files
+                }
+                with open(os.path.join(tmp_dir, self.MANIFEST), 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_dir, os.path.join(self.backup_dir, name))
+            except Exception:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+
+            log.info(f"Backup {name} created in {time.perf_counter() - start_time:.1f}s, "
+                     f"{len(files)} files, {sum(f['size'] for f in files)} bytes")
+            self.apply_retention()
+            return manifest
+        finally:
+            self._lock.release()
+
+    def list_backups(self) -> List[Dict]:
+        """
+        列出已完成的快照
+
+        Returns:
+            快照清单列表，最新的在前
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            manifest_path = os.path.join(self.backup_dir, name, self.MANIFEST)
+            if os.path.isfile(manifest_path):
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    backups.append(json.load(f))
+        return sorted(backups, key=lambda backup: backup['name'], reverse=True)
+
+    def apply_retention(self):
+        """只保留最新的retention个快照，为0时不清理"""
+        if self.retention <= 0:
+            return
+        for backup in self.list_backups()[self.retention:]:
+            shutil.rmtree(os.path.join(self.backup_dir, backup['name']), ignore_errors=True)
+            log.info(f"Removed old backup {backup['name']}")
+
+    def restore(self, name: Optional[str] = None) -> Dict:
+        """
+        从快照恢复数据库，需在停止抓取和API服务后执行
+
+        全部文件解压并通过完整性检查后才替换现有数据库；
+        被替换的数据库及其WAL文件重命名为 *.before-restore 保留
+
+        Args:
+            name: 快照名称，为空时使用最新快照
+
+        Returns:
+            恢复所用的快照清单
+
+        Raises:
+            FileNotFoundError: 快照不存在
+            ValueError: 快照文件未通过完整性检查
+        """
+        backups = self.list_backups()
+        if name is None:
+            if not backups:
+                raise FileNotFoundError("没有可用的备份")
+            manifest = backups[0]
+        else:
+            manifest = next((backup for backup in backups if backup['name'] == name), None)
+            if manifest is None:
+                raise FileNotFoundError(f"备份 {name} 不存在")
+
+        snapshot_dir = os.path.join(self.backup_dir, manifest['name'])
+        target_dir = os.path.dirname(os.path.abspath(self.db_path))
+        staged = []
+        try:
+            for entry in manifest['files']:
+                source = os.path.join(snapshot_dir, entry['file'])
+                target = os.path.join(target_dir, entry['database'])
+                staging = target + '.restore'
+                opener = gzip.open if entry['file'].endswith('.gz') else open
+                with opener(source, 'rb') as src, open(staging, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                staged.append((staging, target))
+
+                conn = sqlite3.connect(staging)
+                try:
+                    result = conn.execute('PRAGMA integrity_check').fetchall()
+                finally:
+                    conn.close()
+                if result != [('ok',)]:
+                    raise ValueError(f"{entry['database']} 完整性检查失败: {result[0][0]}")
+        except Exception:
+            for staging, _ in staged:
+                if os.path.exists(staging):
+                    os.remove(staging)
+            raise
+
+        # 当前存在但快照中没有的分区（快照之后新建的月份）一并移开
+        restored = {target for _, target in staged}
+        for path in self.storage.database_files():
+            if os.path.abspath(path) not in restored and os.path.exists(path):
+                self._move_aside(os.path.abspath(path))
+
+        for staging, target in staged:
+            self._move_aside(target)
+            os.replace(staging, target)
+
+        log.info(f"Restored backup {manifest['name']} ({len(staged)} files)")
+        return manifest
+
+    @staticmethod
+    def _move_aside(path: str):
+        """把数据库及其WAL和共享内存文件重命名为 *.before-restore"""
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.replace(path + suffix, f"{path}.before-restore{suffix}")
@@ -1,19 +1,80 @@
+import time
+
+# 记录启动时间，用于统计启动耗时
+_START_TIME = time.perf_counter()
+
 import yaml
 import sqlite3
-import schedule
-import time
-import feedparser
 import argparse
 import sys
+import os
+import socket
 import threading
-from typing import List, Dict
-from utils.Logger import get_logger
+import queue
+import json
+from typing import Callable, List, Dict, Tuple, Iterable, Iterator, Optional
+from utils.Logger import get_logger, configure_logging
+from utils.Tokenizer import tokenize, extract_terms
+from utils import SimHash
+from storage import compile_keyword_expression, create_storage
 
 # 初始化全局日志记录器
 log = get_logger(__name__)
 
 
+class FeedItem:
+    """RSS条目，只保留入库和推送需要的字段"""
+    __slots__ = ('title', 'link', 'description', 'pub_date', 'guid', 'created_at', 'id', 'cluster_id')
+    
+    def __init__(self, title: str = '', link: str = '', description: str = '', pub_date: str = '', guid: str = ''):
+        self.title = title
+        self.link = link
+        self.description = description
+        self.pub_date = pub_date
+        self.guid = guid
+        # 入库时间（UTC），为空时使用当前时间；回填的历史条目取发布时间
+        self.created_at = None
+        # 入库后填充
+        self.id = None
+        self.cluster_id = None
+
+
+def parse_feed(content: bytes, headers: Optional[Dict] = None) -> Tuple[str, List[FeedItem]]:
+    """
+    解析RSS/Atom内容，失败时抛出异常
+    
+    Args:
+        content: 原始内容
+        headers: 响应头，用于确定编码和相对链接
+        
+    Returns:
+        (源标题, 条目列表)
+    """
+    import feedparser
+    
+    feed = feedparser.parse(content, response_headers=headers)
+    
+    # 内容无法解析且没有任何条目时视为失败
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"Unable to parse feed: {feed.get('bozo_exception')}")
+    
+    # 只提取关键字段，解析结果随即释放
+    return feed.feed.get('title', ''), [
+        FeedItem(
+            title=getattr(entry, 'title', ''),
+            link=getattr(entry, 'link', ''),
+            description=getattr(entry, 'summary', ''),
+            pub_date=getattr(entry, 'published', ''),
+            guid=getattr(entry, 'id', getattr(entry, 'link', ''))
+        )
+        for entry in feed.entries
+    ]
+
+
 class FeedGrepProcessor:
+    # 调度锁租约时长（秒），持有者崩溃后锁在此时间后过期
+    SCHEDULER_LOCK_TTL = 120
+    
     def __init__(self, config_path: str, db_path: str = "feedgrep.db"):
         """
         初始化FeedGrep处理器
@@ -23,97 +84,292 @@ class FeedGrepProcessor:
             db_path: SQLite数据库路径
         """
         # 加载配置文件
+        self.config_path = config_path
+        self.config_mtime = os.path.getmtime(config_path)
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
+        configure_logging(self.config.get('logging'))
+        
+        # 预先构建RSS源索引和编译关键词规则
+        self._keyword_rule_cache = {}
+        self.feed_configs = self._build_feed_index(self.config)
+        self.keyword_rules = self._build_keyword_rules(self.config)
+        self.scheduler_job = None
         
-        # 初始化数据库
+        # 初始化数据库，条目的读写通过存储后端完成
         self.db_path = db_path
+        self.storage = create_storage(self.config, db_path)
         self.init_database()
         
-        # 初始化批处理ID
-        self.current_batch_id = self.get_next_batch_id()
+        # 批处理ID，每轮抓取开始时由start_ingest_run分配
+        self.current_batch_id = None
+        
+        # 推送管理器在首次需要推送时才创建
+        self._push_manager = None
+        
+        # 初始化抓取客户端，按主机复用连接
+        from fetcher import FeedFetcher
+        self.fetcher = FeedFetcher(self.config)
         
-        # 初始化推送管理器
-        from push import PushManager
-        self.push_manager = PushManager(self.config)
+        # 本轮新保存的条目数和ID范围，关键词推送按本轮batch_id查询
+        self.cycle_items_saved = 0
+        self.cycle_first_item_id = None
+        self.cycle_last_item_id = None
+        # 本轮抓取失败的RSS源
+        self.cycle_errors = []
+        # 本轮各RSS源新保存的条目数
+        self.cycle_feed_counts = {}
         
-        # 存储每个源的新条目用于推送
-        self.feed_new_items = {}
+        # 调度锁持有者标识及状态
+        self.lock_owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.scheduler_lock_held = False
+    
+    @property
+    def push_manager(self):
+        """推送管理器，首次访问时才导入推送模块"""
+        if self._push_manager is None:
+            from push import PushManager
+            self._push_manager = PushManager(self.config)
+        return self._push_manager
     
     def init_database(self):
         """初始化数据库表"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # 创建表来存储RSS条目
+        # 使用WAL模式，API的只读查询与抓取写入互不阻塞
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
+        # 创建条目表，按月分区时条目表在各分区文件中
+        self.storage.init_schema(cursor)
+        
+        # 不再创建新的batch_counter表，改用配置文件方式存储batch_id
+        
+        # 调度锁表，保证共享同一数据库的多个进程中只有一个调度器在运行
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_locks (
+                name TEXT PRIMARY KEY,
+                owner TEXT,
+                expires_at REAL
+            )
+        ''')
+        
+        # RSS源租约表，分布式模式下多个worker通过认领租约分摊抓取任务
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS feedgrep_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                link TEXT,
-                description TEXT,
-                pub_date TEXT,
-                guid TEXT,
+            CREATE TABLE IF NOT EXISTS feedgrep_feed_leases (
+                source_name TEXT PRIMARY KEY,
                 category TEXT,
-                source_name TEXT,
-                batch_id INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                url TEXT,
+                next_due_at REAL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                heartbeat_at REAL
             )
         ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_feed_leases_due ON feedgrep_feed_leases(next_due_at)')
         
-        # 创建索引来提高查询速度
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON feedgrep_items(title)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_guid ON feedgrep_items(guid)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_link ON feedgrep_items(link)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON feedgrep_items(category)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_name ON feedgrep_items(source_name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_batch_id ON feedgrep_items(batch_id)')
+        # RSS源健康状态表，记录连续失败次数、延迟和熔断状态
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_feed_health (
+                source_name TEXT PRIMARY KEY,
+                state TEXT DEFAULT 'closed',
+                consecutive_failures INTEGER DEFAULT 0,
+                total_successes INTEGER DEFAULT 0,
+                total_failures INTEGER DEFAULT 0,
+                last_latency_ms INTEGER,
+                avg_latency_ms INTEGER,
+                last_error TEXT,
+                last_success_at REAL,
+                last_failure_at REAL,
+                open_until REAL
+            )
+        ''')
         
-        # 为 is_item_exists 方法添加复合索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_title_link_guid ON feedgrep_items(source_name, title, link, guid)')
+        # SimHash分段索引（LSH），只保留时间窗口内的条目，用于快速查找近似重复
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_simhash_bands (
+                band INTEGER,
+                value INTEGER,
+                item_id INTEGER,
+                created_at REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_simhash_bands ON feedgrep_simhash_bands(band, value)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_simhash_bands_created_at ON feedgrep_simhash_bands(created_at)')
+
+        # 各推送渠道已推送过的聚类，合并推送时只跳过同一渠道已推送过的聚类，只保留聚类时间窗口内的记录
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_pushed_clusters (
+                channel TEXT,
+                cluster_id INTEGER,
+                pushed_at REAL,
+                PRIMARY KEY (channel, cluster_id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_pushed_clusters_pushed_at ON feedgrep_pushed_clusters(pushed_at)')
         
-        # 为关键词搜索添加复合索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON feedgrep_items(created_at DESC)')
+        # 抓取批次记录表，batch_id在此分配，供增量同步接口查询
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_ingest_runs (
+                batch_id INTEGER PRIMARY KEY,
+                owner TEXT,
+                status TEXT DEFAULT 'running',
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP,
+                feeds_processed INTEGER DEFAULT 0,
+                items_saved INTEGER DEFAULT 0,
+                first_item_id INTEGER,
+                last_item_id INTEGER,
+                feed_counts TEXT,
+                errors TEXT
+            )
+        ''')
         
-        # 为分类和时间组合查询添加索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_created_at ON feedgrep_items(category, created_at DESC)')
+        # 分类和来源的计数器，在保存条目的事务中增量更新，查询计数时不扫描条目表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_facet_totals (
+                facet_type TEXT,
+                facet_value TEXT,
+                total INTEGER DEFAULT 0,
+                PRIMARY KEY (facet_type, facet_value)
+            )
+        ''')
+        # 按批次和小时分桶的计数，用于最近24小时和某批次之后的新条目数，只保留最近若干天
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_facet_buckets (
+                facet_type TEXT,
+                facet_value TEXT,
+                batch_id INTEGER,
+                hour INTEGER,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (facet_type, facet_value, batch_id, hour)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_facet_buckets_hour ON feedgrep_facet_buckets(hour)')
         
-        # 为来源和时间组合查询添加索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_name_created_at ON feedgrep_items(source_name, created_at DESC)')
+        # 热词计数，按词和小时分桶，查询热词时只聚合该表，不扫描条目标题
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_term_buckets (
+                term TEXT,
+                hour INTEGER,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (term, hour)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_term_buckets_hour ON feedgrep_term_buckets(hour)')
         
-        # 不再创建新的batch_counter表，改用配置文件方式存储batch_id
+        # 旧数据库首次启用计数器时，从已有条目一次性构建
+        cursor.execute('SELECT 1 FROM feedgrep_facet_totals LIMIT 1')
+        if cursor.fetchone() is None:
+            self._rebuild_facet_counters(cursor)
         
         conn.commit()
         conn.close()
     
-    def get_next_batch_id(self) -> int:
+    def _rebuild_facet_counters(self, cursor: sqlite3.Cursor):
+        """根据已有条目重建分类和来源计数器，由存储后端汇总各分区"""
+        retention_days = (self.config.get('facets', {}) or {}).get('retention_days', 7)
+        min_hour = int(time.time() // 3600) - retention_days * 24
+        cursor.execute('DELETE FROM feedgrep_facet_totals')
+        cursor.execute('DELETE FROM feedgrep_facet_buckets')
+        for facet_type, column in (('category', 'category'), ('source', 'source_name')):
+            cursor.executemany('''
+                INSERT INTO feedgrep_facet_totals (facet_type, facet_value, total) VALUES (?, ?, ?)
+            ''', [(facet_type,) + row for row in self.storage.count_items(column)])
+            cursor.executemany('''
+                INSERT INTO feedgrep_facet_buckets (facet_type, facet_value, batch_id, hour, count) VALUES (?, ?, ?, ?, ?)
+            ''', [(facet_type,) + row for row in self.storage.count_items(column, min_hour)])
+    
+    def _increment_facet_counters(self, cursor: sqlite3.Cursor, category: str, source_name: str, recent: bool = True):
+        """在保存条目的事务中为分类和来源计数加一，recent为False时只累加总数，不计入批次和小时分桶"""
+        hour = int(time.time() // 3600)
+        for facet_type, facet_value in (('category', category), ('source', source_name)):
+            cursor.execute('''
+                INSERT INTO feedgrep_facet_totals (facet_type, facet_value, total) VALUES (?, ?, 1)
+                ON CONFLICT(facet_type, facet_value) DO UPDATE SET total = total + 1
+            ''', (facet_type, facet_value))
+            if not recent:
+                continue
+            cursor.execute('''
+                INSERT INTO feedgrep_facet_buckets (facet_type, facet_value, batch_id, hour, count) VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(facet_type, facet_value, batch_id, hour) DO UPDATE SET count = count + 1
+            ''', (facet_type, facet_value, self.current_batch_id, hour))
+    
+    def _increment_term_counters(self, cursor: sqlite3.Cursor, title: str):
+        """在保存条目的事务中累加标题中每个词和词组的当前小时计数，同一标题内重复的词只计一次"""
+        if not (self.config.get('trending', {}) or {}).get('enabled', True):
+            return
+        hour = int(time.time() // 3600)
+        cursor.executemany('''
+            INSERT INTO feedgrep_term_buckets (term, hour, count) VALUES (?, ?, 1)
+            ON CONFLICT(term, hour) DO UPDATE SET count = count + 1
+        ''', [(term, hour) for term in extract_terms(title)])
+    
+    def start_ingest_run(self) -> int:
         """
-        获取下一个批处理ID，并将其加1
+        开始一轮抓取：原子地分配batch_id并写入批次记录，重置本轮统计
         
         Returns:
-            下一个批处理ID
+            本轮的batch_id
         """
-        # 使用feedgrep_items表中的最大batch_id作为当前batch_id，然后加1
+        self.cycle_items_saved = 0
+        self.cycle_first_item_id = None
+        self.cycle_last_item_id = None
+        self.cycle_feed_counts = {}
+        
+        # 兼容没有批次记录的旧数据库，新batch_id同时大于已有条目中的最大值
+        max_item_batch_id = self.storage.max_batch_id()
+        conn = sqlite3.connect(self.db_path, timeout=20.0, isolation_level=None)
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
-            # 获取当前最大的batch_id
-            cursor.execute('SELECT COALESCE(MAX(batch_id), 0) FROM feedgrep_items')
-            max_batch_id = cursor.fetchone()[0]
-            
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT MAX((SELECT COALESCE(MAX(batch_id), 0) FROM feedgrep_ingest_runs), ?) + 1
+            ''', (max_item_batch_id,))
+            batch_id = cursor.fetchone()[0]
+            cursor.execute(
+                'INSERT INTO feedgrep_ingest_runs (batch_id, owner) VALUES (?, ?)',
+                (batch_id, self.lock_owner)
+            )
+            cursor.execute('COMMIT')
+        finally:
+            conn.close()
+        
+        self.current_batch_id = batch_id
+        return batch_id
+    
+    def finish_ingest_run(self, errors: List[Tuple[str, str]]):
+        """
+        结束一轮抓取，记录各RSS源新条目数、错误和条目ID范围
+        
+        Args:
+            errors: 本轮失败的 (源名称, 错误信息) 列表
+        """
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            conn.execute('''
+                UPDATE feedgrep_ingest_runs SET
+                    status = ?, finished_at = CURRENT_TIMESTAMP, feeds_processed = ?, items_saved = ?,
+                    first_item_id = ?, last_item_id = ?, feed_counts = ?, errors = ?
+                WHERE batch_id = ?
+            ''', (
+                'partial' if errors else 'success',
+                len(self.cycle_feed_counts),
+                self.cycle_items_saved,
+                self.cycle_first_item_id,
+                self.cycle_last_item_id,
+                json.dumps(self.cycle_feed_counts, ensure_ascii=False),
+                json.dumps([{'source_name': name, 'error': error} for name, error in errors], ensure_ascii=False),
+                self.current_batch_id
+            ))
+            conn.commit()
             conn.close()
-            
-            # 下一个batch_id应该是最大值加1，最小为1
-            return max(1, max_batch_id + 1)
-            
         except Exception as e:
-            log.error(f"Error getting next batch ID: {e}")
-            return 1
+            log.error(f"Error recording ingest run {self.current_batch_id}: {e}")
     
-    def fetch_rss_feed(self, url: str) -> List[Dict]:
+    def _fetch_and_parse(self, url: str) -> List[FeedItem]:
         """
-        获取并解析RSS源
+        获取并解析RSS源，失败时抛出异常
         
         Args:
             url: RSS源地址
@@ -121,140 +377,408 @@ class FeedGrepProcessor:
         Returns:
             解析后的RSS条目列表
         """
-        try:
-            # 设置feedparser的超时和代理（如果需要）
-            import socket
-            socket.setdefaulttimeout(30)
-            feed = feedparser.parse(url)
-            items = []
-            
-            for entry in feed.entries:
-                # 提取关键字段
-                item = {
-                    'title': getattr(entry, 'title', ''),
-                    'link': getattr(entry, 'link', ''),
-                    'description': getattr(entry, 'summary', ''),
-                    'pub_date': getattr(entry, 'published', ''),
-                    'guid': getattr(entry, 'id', getattr(entry, 'link', ''))
-                }
-                
-                items.append(item)
-            
-            return items
-        except Exception as e:
-            log.error(f"Error fetching RSS feed from {url}: {e}")
-            return []
+        # 通过连接池抓取原始内容，再交给feedparser解析
+        content, headers = self.fetcher.fetch(url)
+        return parse_feed(content, headers)[1]
     
-    def is_item_exists(self, guid: str, link: str, title: str, source_name: str) -> bool:
+    def is_feed_circuit_open(self, source_name: str) -> bool:
         """
-        检查条目是否已存在
+        检查RSS源的熔断状态
+        
+        熔断打开且未到重试时间时返回True；到达重试时间后转为半开状态，
+        允许一次探测抓取
         
         Args:
-            guid: 条目的GUID
-            link: 条目的链接
-            title: 条目的标题
-            source_name: 条目来源名称
+            source_name: RSS源名称
             
         Returns:
-            如果条目已存在返回True，否则返回False
+            需要跳过本次抓取时返回True
         """
-        max_retries = 3
-        for attempt in range(max_retries):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
             try:
-                conn = sqlite3.connect(self.db_path, timeout=20.0)
                 cursor = conn.cursor()
-
-                cursor.execute(
-                    'SELECT COUNT(*) FROM feedgrep_items WHERE source_name = ? AND title = ? AND link = ?',
-                    (source_name, title, link)
-                )
-                count = cursor.fetchone()[0]
+                cursor.execute('SELECT state, open_until FROM feedgrep_feed_health WHERE source_name = ?', (source_name,))
+                row = cursor.fetchone()
+                if not row or row[0] != 'open':
+                    return False
+                if row[1] > time.time():
+                    return True
                 
+                cursor.execute("UPDATE feedgrep_feed_health SET state = 'half_open' WHERE source_name = ?", (source_name,))
+                conn.commit()
+                return False
+            finally:
                 conn.close()
-                return count > 0
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
+        except Exception as e:
+            log.error(f"Error checking circuit state for {source_name}: {e}")
+            return False
+    
+    def record_feed_result(self, source_name: str, success: bool, latency: float, error: str = None):
+        """
+        记录一次抓取结果，更新连续失败次数、延迟和熔断状态
+        
+        连续失败达到阈值后打开熔断，重试间隔按失败次数指数增长，
+        成功一次即关闭熔断
+        
+        Args:
+            source_name: RSS源名称
+            success: 是否抓取成功
+            latency: 抓取耗时（秒）
+            error: 失败原因
+        """
+        breaker_config = self.config.get('circuit_breaker', {}) or {}
+        failure_threshold = breaker_config.get('failure_threshold', 3)
+        base_backoff = breaker_config.get('base_backoff_minutes', 30) * 60
+        max_backoff = breaker_config.get('max_backoff_minutes', 1440) * 60
+        
+        now = time.time()
+        latency_ms = int(latency * 1000)
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT consecutive_failures, avg_latency_ms FROM feedgrep_feed_health WHERE source_name = ?',
+                (source_name,)
+            )
+            row = cursor.fetchone()
+            consecutive_failures, avg_latency_ms = row if row else (0, None)
+            # 平均延迟使用指数加权移动平均
+            avg_latency_ms = latency_ms if avg_latency_ms is None else int(avg_latency_ms * 0.8 + latency_ms * 0.2)
+            
+            if success:
+                consecutive_failures = 0
+                state, open_until = 'closed', None
+            else:
+                consecutive_failures += 1
+                if consecutive_failures >= failure_threshold:
+                    backoff = min(base_backoff * 2 ** (consecutive_failures - failure_threshold), max_backoff)
+                    state, open_until = 'open', now + backoff
+                    log.warning(f"Circuit opened for feed {source_name} after {consecutive_failures} failures, "
+                                f"retry in {int(backoff / 60)} minutes")
                 else:
-                    log.error(f"Error checking item existence after {attempt+1} attempts: {e}")
-                    if 'conn' in locals():
-                        conn.close()
-                    return False
-            except Exception as e:
-                log.error(f"Unexpected error checking item existence: {e}")
-                if 'conn' in locals():
-                    conn.close()
-                return False
-        return False
+                    state, open_until = 'closed', None
+            
+            cursor.execute('''
+                INSERT INTO feedgrep_feed_health (
+                    source_name, state, consecutive_failures, total_successes, total_failures,
+                    last_latency_ms, avg_latency_ms, last_error, last_success_at, last_failure_at, open_until
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source_name) DO UPDATE SET
+                    state = excluded.state,
+                    consecutive_failures = excluded.consecutive_failures,
+                    total_successes = total_successes + excluded.total_successes,
+                    total_failures = total_failures + excluded.total_failures,
+                    last_latency_ms = excluded.last_latency_ms,
+                    avg_latency_ms = excluded.avg_latency_ms,
+                    last_error = COALESCE(excluded.last_error, last_error),
+                    last_success_at = COALESCE(excluded.last_success_at, last_success_at),
+                    last_failure_at = COALESCE(excluded.last_failure_at, last_failure_at),
+                    open_until = excluded.open_until
+            ''', (
+                source_name, state, consecutive_failures, int(success), int(not success),
+                latency_ms, avg_latency_ms, error,
+                now if success else None, None if success else now, open_until
+            ))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            log.error(f"Error recording feed health for {source_name}: {e}")
     
-    def save_item(self, item: Dict, category: str, source_name: str) -> bool:
+    def save_item(self, item: FeedItem, category: str, source_name: str) -> bool:
         """
-        保存单个RSS条目到数据库
+        保存单个RSS条目到数据库，保存成功后填充条目的id和cluster_id
         
         Args:
-            item: RSS条目字典
+            item: RSS条目
             category: 条目所属类别
             source_name: RSS源名称
             
         Returns:
             保存成功返回True，否则返回False
         """
-        # 检查条目是否已存在
-        if self.is_item_exists(item['guid'], item['link'], item['title'], source_name):
-            return False  # 条目已存在，不需要保存
+        return bool(self.save_items([item], category, source_name))
+    
+    def save_items(self, items: Iterable[FeedItem], category: str, source_name: str,
+                   cluster: bool = True, recent: bool = True) -> List[FeedItem]:
+        """
+        在一个事务中保存同一RSS源的多个条目，已存在的条目跳过
         
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
+        聚类、分类计数和热词计数与条目插入在同一事务中更新
+        
+        Args:
+            items: RSS条目序列
+            category: 条目所属类别
+            source_name: RSS源名称
+            cluster: 是否分配近似重复聚类
+            recent: 是否为新抓取的条目，回填的历史条目为False，不计入热词和最近新条目计数
+            
+        Returns:
+            新保存的条目列表，已填充id，分配聚类时填充cluster_id
+        """
+        def on_insert(cursor: sqlite3.Cursor, item: FeedItem):
+            if cluster:
+                item.cluster_id = self._assign_cluster(cursor, item.id, item.title)
+            self._increment_facet_counters(cursor, category, source_name, recent)
+            if recent:
+                self._increment_term_counters(cursor, item.title)
+        
+        saved = self.storage.insert_batch(items, category, source_name, self.current_batch_id, on_insert)
+        for item in saved:
+            # 逐条日志只在DEBUG级别输出，参数延迟格式化
+            log.debug("[%s - %s] Saved new item: %s", category, source_name, item.title)
+        if saved:
+            # 只记录条数和ID范围，条目ID递增
+            self.cycle_items_saved += len(saved)
+            if self.cycle_first_item_id is None:
+                self.cycle_first_item_id = saved[0].id
+            self.cycle_last_item_id = saved[-1].id
+        return saved
+    
+    def _assign_cluster(self, cursor: sqlite3.Cursor, item_id: int, title: str) -> int:
+        """
+        计算标题的SimHash签名，在时间窗口内查找近似重复条目并分配聚类
+        
+        Args:
+            cursor: 保存条目所用事务的游标
+            item_id: 新条目ID
+            title: 条目标题
+            
+        Returns:
+            聚类ID，没有近似重复时为条目自身ID
+        """
+        cluster_config = self.config.get('cluster', {}) or {}
+        tokens = tokenize(title)
+        # 聚类关闭或标题过短时不参与聚类
+        if not cluster_config.get('enabled', True) or len(tokens) < 3:
+            self.storage.set_cluster(cursor, item_id, item_id)
+            return item_id
+        
+        signature = SimHash.simhash(tokens)
+        item_bands = SimHash.bands(signature)
+        now = time.time()
+        window_start = now - cluster_config.get('window_hours', 48) * 3600
+        max_distance = cluster_config.get('max_distance', 6)
+        
+        # 任意一段相同的条目为候选，再按汉明距离精确判断
+        band_conditions = " OR ".join(["(b.band = ? AND b.value = ?)"] * len(item_bands))
+        band_params = [param for band, value in enumerate(item_bands) for param in (band, value)]
+        cursor.execute(f'''
+            SELECT DISTINCT item_id FROM feedgrep_simhash_bands b
+            WHERE ({band_conditions}) AND b.created_at >= ?
+        ''', band_params + [window_start])
+        candidate_ids = [row[0] for row in cursor.fetchall()]
+        
+        cluster_id = item_id
+        best_distance = max_distance + 1
+        for candidate_id, candidate_simhash, candidate_cluster in self.storage.cluster_candidates(cursor, candidate_ids):
+            distance = SimHash.hamming_distance(signature, SimHash.to_unsigned(candidate_simhash))
+            if distance < best_distance:
+                best_distance = distance
+                cluster_id = candidate_cluster or candidate_id
+        
+        self.storage.set_cluster(cursor, item_id, cluster_id, SimHash.to_signed(signature))
+        cursor.executemany(
+            'INSERT INTO feedgrep_simhash_bands (band, value, item_id, created_at) VALUES (?, ?, ?, ?)',
+            [(band, value, item_id, now) for band, value in enumerate(item_bands)]
+        )
+        return cluster_id
+    
+    def prune_indexes(self):
+        """清理聚类时间窗口之外的SimHash分段索引和推送记录、超出保留期的计数和热词分桶，以及过期的条目分区"""
+        cluster_config = self.config.get('cluster', {}) or {}
+        window_start = time.time() - cluster_config.get('window_hours', 48) * 3600
+        retention_days = (self.config.get('facets', {}) or {}).get('retention_days', 7)
+        min_hour = int(time.time() // 3600) - retention_days * 24
+        term_retention_days = (self.config.get('trending', {}) or {}).get('retention_days', 7)
+        min_term_hour = int(time.time() // 3600) - term_retention_days * 24
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            conn.execute('DELETE FROM feedgrep_simhash_bands WHERE created_at < ?', (window_start,))
+            conn.execute('DELETE FROM feedgrep_pushed_clusters WHERE pushed_at < ?', (window_start,))
+            conn.execute('DELETE FROM feedgrep_facet_buckets WHERE hour < ?', (min_hour,))
+            conn.execute('DELETE FROM feedgrep_term_buckets WHERE hour < ?', (min_term_hour,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            log.error(f"Error pruning indexes: {e}")
+        
+        # 按月分区时直接删除过期分区文件，随后重建计数器
+        retention_months = (self.config.get('storage', {}) or {}).get('retention_months', 0)
+        try:
+            dropped = self.storage.drop_partitions(retention_months)
+            if dropped:
+                log.info(f"Dropped {len(dropped)} expired partitions: {', '.join(dropped)}")
                 conn = sqlite3.connect(self.db_path, timeout=20.0)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO feedgrep_items (title, link, description, pub_date, guid, category, source_name, batch_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    item['title'],
-                    item['link'],
-                    item['description'],
-                    item['pub_date'],
-                    item['guid'],
-                    category,
-                    source_name,
-                    self.current_batch_id
-                ))
-                
+                self._rebuild_facet_counters(conn.cursor())
                 conn.commit()
                 conn.close()
-                
-                log.info(f"[{category} - {source_name}] Saved new item: {item['title']}")
-                
-                # 记录新条目用于推送
-                if source_name not in self.feed_new_items:
-                    self.feed_new_items[source_name] = []
-                self.feed_new_items[source_name].append(item)
-                
-                return True
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
-                else:
-                    log.error(f"Error saving item after {attempt+1} attempts: {e}")
-                    if 'conn' in locals():
-                        conn.close()
-                    return False
-            except sqlite3.IntegrityError:
-                # 可能是唯一约束冲突（并发情况下）
-                if 'conn' in locals():
-                    conn.close()
-                return False
-            except Exception as e:
-                log.error(f"Unexpected error saving item: {e}")
-                if 'conn' in locals():
-                    conn.close()
-                return False
-        return False
+        except Exception as e:
+            log.error(f"Error dropping expired partitions: {e}")
+    
+    def send_item_push(self, push_channels: List[str], items: List[Dict],
+                       build_message: Callable[[List[Dict]], Tuple[str, str]]):
+        """
+        推送条目，开启collapse_push时每个渠道跳过已推送到该渠道的聚类
+        
+        同一批条目中属于同一聚类的只推送第一条；推送成功后记录各渠道已推送的聚类，
+        同一事件的后续条目不再推送到这些渠道，其他渠道不受影响
+        
+        Args:
+            push_channels: 推送渠道
+            items: 条目字典列表，包含title、link、source_name、cluster_id
+            build_message: 根据条目列表生成 (标题, 内容)
+        """
+        if not push_channels or not items:
+            return
+        if not (self.config.get('cluster', {}) or {}).get('collapse_push', False):
+            self.push_manager.send_bulk_push(push_channels, *build_message(items))
+            return
+        
+        pushed = self._load_pushed_clusters(push_channels, {item.get('cluster_id') for item in items} - {None})
+        # 需要推送的条目相同的渠道共用一条消息
+        groups = {}
+        for channel in push_channels:
+            selected, seen = [], set()
+            for item in items:
+                cluster_id = item.get('cluster_id')
+                if cluster_id is not None:
+                    if (channel, cluster_id) in pushed or cluster_id in seen:
+                        continue
+                    seen.add(cluster_id)
+                selected.append(item)
+            if selected:
+                key = tuple(id(item) for item in selected)
+                groups.setdefault(key, (selected, []))[1].append(channel)
+        
+        for selected, channels in groups.values():
+            title, content = build_message(selected)
+            sent = [channel for channel in channels if self.push_manager.send_push(channel, title, content)]
+            self._record_pushed_clusters(sent, {item.get('cluster_id') for item in selected} - {None})
+    
+    def _load_pushed_clusters(self, channels: List[str], cluster_ids: set) -> set:
+        """查询已推送过的 (渠道, 聚类ID)"""
+        if not cluster_ids:
+            return set()
+        cluster_ids = list(cluster_ids)
+        pushed = set()
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            try:
+                # 分段查询，参数数量不超过SQLite的上限
+                for start in range(0, len(cluster_ids), 500):
+                    chunk = cluster_ids[start:start + 500]
+                    pushed.update(conn.execute(f'''
+                        SELECT channel, cluster_id FROM feedgrep_pushed_clusters
+                        WHERE channel IN ({', '.join('?' * len(channels))})
+                        AND cluster_id IN ({', '.join('?' * len(chunk))})
+                    ''', list(channels) + chunk).fetchall())
+            finally:
+                conn.close()
+        except Exception as e:
+            log.error(f"Error loading pushed clusters: {e}")
+        return pushed
+    
+    def _record_pushed_clusters(self, channels: List[str], cluster_ids: set):
+        """记录各渠道推送成功的聚类"""
+        if not channels or not cluster_ids:
+            return
+        now = time.time()
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            conn.executemany('''
+                INSERT INTO feedgrep_pushed_clusters (channel, cluster_id, pushed_at) VALUES (?, ?, ?)
+                ON CONFLICT(channel, cluster_id) DO UPDATE SET pushed_at = excluded.pushed_at
+            ''', [(channel, cluster_id, now) for channel in channels for cluster_id in cluster_ids])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            log.error(f"Error recording pushed clusters: {e}")
+
+    def fetch_feed(self, url: str, source_name: str) -> Optional[List[FeedItem]]:
+        """
+        抓取阶段：检查熔断状态，抓取解析RSS源并记录健康状态
+        
+        Args:
+            url: RSS源地址
+            source_name: RSS源名称
+            
+        Returns:
+            解析后的条目列表，跳过或失败时返回None
+        """
+        # 熔断打开的源直接跳过，不占用抓取时间
+        if self.is_feed_circuit_open(source_name):
+            log.info(f"Skipping feed {source_name}: circuit open")
+            return None
+        
+        log.info(f"Processing feed: {source_name} ({url})")
+        start = time.monotonic()
+        try:
+            items = self._fetch_and_parse(url)
+        except Exception as e:
+            log.error(f"Error fetching RSS feed from {url}: {e}")
+            self.record_feed_result(source_name, False, time.monotonic() - start, str(e))
+            self.cycle_errors.append((source_name, str(e)))
+            return None
+        self.record_feed_result(source_name, True, time.monotonic() - start)
+        return items
+    
+    def store_feed_items(self, items: Iterable[FeedItem], category: str, source_name: str) -> int:
+        """
+        入库阶段：在一个事务中保存该源的条目并增量构建推送内容，处理完后发送推送
+        
+        Args:
+            items: 条目序列
+            category: RSS源所属类别
+            source_name: RSS源名称
+            
+        Returns:
+            新保存的条目数
+        """
+        start_time = time.perf_counter()
+        items = list(items)
+        total_count = len(items)
+        saved = self.save_items(items, category, source_name)
+        new_items_count = len(saved)
+        
+        log.info(f"[{category} - {source_name}] {total_count} items, {new_items_count} new, "
+                 f"{total_count - new_items_count} skipped in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+        self.cycle_feed_counts[source_name] = self.cycle_feed_counts.get(source_name, 0) + new_items_count
+        
+        self.push_feed_items(saved, category, source_name)
+        return new_items_count
+    
+    def push_feed_items(self, items: List[FeedItem], category: str, source_name: str):
+        """
+        推送RSS源的新条目到该源配置的推送渠道
+        
+        Args:
+            items: 新保存的条目
+            category: RSS源所属类别
+            source_name: RSS源名称
+        """
+        from push import PushContentBuilder
+        
+        feed_config = self.feed_configs.get((category, source_name)) or {}
+        push_channels = feed_config.get('push_channels', [])
+        if not push_channels or not items:
+            return
+        
+        def build_message(selected: List[Dict]) -> Tuple[str, str]:
+            builder = PushContentBuilder(max_length=20000)
+            for item in selected:
+                builder.add_link(item['title'], item['link'])
+            title = f"[FeedGrep] {source_name} 有 {builder.count} 条新内容\n"
+            content = builder.build()
+            if builder.truncated:
+                content += f"\n... 还有更多内容（共{builder.count}条）"
+            return title, content
+        
+        # 合并已推送到同一渠道的近似重复条目
+        self.send_item_push(push_channels, [
+            {'title': item.title, 'link': item.link, 'source_name': source_name, 'cluster_id': item.cluster_id}
+            for item in items
+        ], build_message)
     
     def process_feed(self, url: str, category: str, source_name: str):
         """
@@ -265,119 +789,193 @@ class FeedGrepProcessor:
             category: RSS源所属类别
             source_name: RSS源名称
         """
-        log.info(f"Processing feed: {source_name} ({url}) - Category: {category}")
-        items = self.fetch_rss_feed(url)
+        items = self.fetch_feed(url, source_name)
+        if items is not None:
+            self.store_feed_items(items, category, source_name)
+    
+    def iter_fetched_feeds(self, feeds: List[Tuple[str, str, str]]) -> Iterator[Tuple[str, str, List[FeedItem]]]:
+        """
+        并行抓取RSS源，按完成顺序逐个产出解析结果
         
-        new_items_count = 0
-        for item in items:
-            if self.save_item(item, category, source_name):
-                new_items_count += 1
+        抓取线程把结果放入有界队列，队列满时等待入库消费，
+        内存中最多同时存在 queue_size 个已解析的源
         
-        log.info(f"Feed {source_name} processed. {new_items_count} new items saved.")
+        Args:
+            feeds: (分类, 源名称, 地址) 列表
+            
+        Yields:
+            (分类, 源名称, 条目列表)
+        """
+        ingest_config = self.config.get('ingest', {}) or {}
+        fetch_workers = max(1, min(ingest_config.get('fetch_workers', 4), len(feeds) or 1))
+        results = queue.Queue(maxsize=max(1, ingest_config.get('queue_size', 8)))
+        pending = queue.Queue()
+        for feed in feeds:
+            pending.put(feed)
         
-        # 推送RSS源的新内容
-        feed_config_list = self.config.get('categories', {}).get(category, [])
-        feed_config = None
-        for fc in feed_config_list:
-            if fc.get('name') == source_name:
-                feed_config = fc
-                break
-                
-        if feed_config and new_items_count > 0:
-            push_channels = feed_config.get('push_channels', [])
-            if push_channels:
-                title = f"[FeedGrep] {source_name} 有 {new_items_count} 条新内容\n"
-                content = ""
-                
-                for i, item in enumerate(self.feed_new_items.get(source_name, []), 1):
-                    # 添加序号和超链接到内容
-                    content += f"\n{i}. [{item['title']}]({item['link']})\n"
-                    
-                    # 限制总内容长度
-                    if len(content) > 20000:
-                        content += f"\n... 还有更多内容（共{new_items_count}条）"
-                        break
-                        
-                self.push_manager.send_bulk_push(push_channels, title, content)
+        def worker():
+            try:
+                while True:
+                    try:
+                        category, source_name, url = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        items = self.fetch_feed(url, source_name)
+                    except Exception as e:
+                        log.error(f"Failed to fetch feed {source_name} ({url}): {e}")
+                        items = None
+                    if items is not None:
+                        results.put((category, source_name, items))
+            finally:
+                results.put(None)  # 线程结束标记
+        
+        for _ in range(fetch_workers):
+            threading.Thread(target=worker, daemon=True).start()
+        
+        finished = 0
+        while finished < fetch_workers:
+            result = results.get()
+            if result is None:
+                finished += 1
+                continue
+            yield result
     
     def process_all_feeds(self):
-        """处理所有配置的RSS源"""
+        """处理所有配置的RSS源：并行抓取，单线程按顺序入库"""
         log.info("Starting to process all feeds...")
         
-        # 生成新的批处理ID
-        self.current_batch_id = self.get_next_batch_id()
+        # 生成新的批处理ID并记录批次
+        self.cycle_errors = []
+        self.start_ingest_run()
         log.info(f"Starting batch processing with batch_id: {self.current_batch_id}")
         
-        # 清空之前的新条目记录
-        self.feed_new_items = {}
-        
         # 处理分类的RSS源
-        categories = self.config.get('categories', {})
-        for category, feeds in categories.items():
-            for feed in feeds:
-                source_name = feed.get('name', 'Unknown')
-                url = feed.get('url', '')
-                if url:
-                    try:
-                        self.process_feed(url, category, source_name)
-                    except Exception as e:
-                        log.error(f"Failed to process feed {source_name} ({url}): {e}")
+        feeds = [(category, source_name, feed.get('url', ''))
+                 for (category, source_name), feed in self.feed_configs.items() if feed.get('url')]
+        for category, source_name, items in self.iter_fetched_feeds(feeds):
+            try:
+                self.store_feed_items(items, category, source_name)
+            except Exception as e:
+                log.error(f"Failed to process feed {source_name}: {e}")
+                self.cycle_errors.append((source_name, str(e)))
         
         # 处理关键词推送
         self.process_keyword_pushes()
         
+        # 清理聚类窗口和计数保留期之外的索引
+        self.prune_indexes()
+        
+        self.finish_ingest_run(self.cycle_errors)
         log.info("All feeds processed.")
 
+    def backfill(self, directory: str, category: str = None, source_name: str = None,
+                 processes: int = None, batch_size: int = 5000, skip_push: bool = False) -> int:
+        """
+        离线回填：用进程池解析目录中的RSS文件，按与抓取相同的查重规则批量入库
+
+        目录结构为 <分类>/<源名称>/文件 且与配置中的源一致时归入该源，
+        否则使用指定的分类和源名称，未指定时分类为backfill、源名称为RSS源标题。
+        入库时间取条目的发布时间；历史条目只计入分类和来源总数，不参与近似重复聚类，
+        也不计入热词和最近新条目计数
+
+        Args:
+            directory: RSS文件目录，支持.gz压缩文件
+            category: 默认分类
+            source_name: 默认源名称
+            processes: 解析进程数，默认CPU核数
+            batch_size: 每个事务保存的最大条目数
+            skip_push: 是否跳过RSS源推送和关键词推送
+
+        Returns:
+            新保存的条目数
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from importer import find_feed_files, parse_feed_file
+
+        paths = find_feed_files(directory)
+        log.info(f"Backfilling {len(paths)} files from {directory}")
+        self.cycle_errors = []
+        self.start_ingest_run()
+        start_time = time.perf_counter()
+        pending = {}
+
+        def flush(key):
+            items = pending.pop(key, [])
+            if not items:
+                return
+            saved = self.save_items(items, key[0], key[1], cluster=False, recent=False)
+            self.cycle_feed_counts[key[1]] = self.cycle_feed_counts.get(key[1], 0) + len(saved)
+            log.info(f"[{key[0]} - {key[1]}] {len(items)} items, {len(saved)} new")
+            if not skip_push:
+                self.push_feed_items(saved, key[0], key[1])
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunksize = max(1, len(paths) // ((processes or os.cpu_count() or 1) * 4))
+            for path, title, items in executor.map(parse_feed_file, paths, chunksize=chunksize):
+                if items is None:
+                    log.error(f"Failed to parse {path}: {title}")
+                    self.cycle_errors.append((path, title))
+                    continue
+                parts = os.path.relpath(path, directory).split(os.sep)
+                if len(parts) >= 3 and (parts[0], parts[1]) in self.feed_configs:
+                    key = (parts[0], parts[1])
+                else:
+                    key = (category or 'backfill', source_name or title or os.path.basename(path))
+                pending.setdefault(key, []).extend(items)
+                if len(pending[key]) >= batch_size:
+                    flush(key)
+
+        for key in list(pending):
+            flush(key)
+
+        if not skip_push:
+            self.process_keyword_pushes()
+        self.prune_indexes()
+        self.finish_ingest_run(self.cycle_errors)
+        log.info(f"Backfill finished: {self.cycle_items_saved} new items from {len(paths)} files "
+                 f"in {time.perf_counter() - start_time:.1f}s")
+        return self.cycle_items_saved
+
     def process_keyword_pushes(self):
         """处理基于关键词的推送"""
-        if not self.push_manager.push_enabled:
+        # 只在本轮新保存的条目中匹配，保证每个条目只被评估一次
+        if not self.cycle_items_saved or not self.push_manager.push_enabled:
             return
             
-        # 获取默认关键词配置
-        default_keywords = self.config.get('default_keywords', [])
-        
-        # 遍历每个关键词配置
-        for i, keyword_config in enumerate(default_keywords):
-            # 检查是否有针对此关键词的推送配置
-            keyword_push_config = None
-            if isinstance(keyword_config, dict):
-                keyword_push_config = keyword_config
-                keyword_expr = keyword_config.get('keywords', '')
-            else:
-                keyword_expr = keyword_config
-                
-            # 如果没有推送配置，跳过
-            if isinstance(keyword_push_config, dict) and 'push_channels' not in keyword_push_config:
-                continue
-                
-            push_channels = keyword_push_config.get('push_channels', []) if isinstance(keyword_push_config, dict) else []
+        # 遍历预编译的关键词规则，没有推送渠道的规则跳过
+        for rule in self.keyword_rules:
+            push_channels = rule['push_channels']
             if not push_channels:
                 continue
+            keyword_expr = rule['keywords']
             
-            # 搜索匹配该关键词的内容
+            # 搜索匹配该关键词的内容，合并已推送到同一渠道的近似重复条目
             matched_items = self.search_items_by_keyword(keyword_expr)
-            
-            # 如果有匹配的内容，则发送推送
-            if matched_items:
-                # 构造推送标题和内容
-                first_keyword = keyword_expr.split()[0]  # 取第一个关键词作为标题的一部分
-                title = f"[FeedGrep关键词] {first_keyword} 有 {len(matched_items)} 条新内容"
-                
-                content = ""
-
-                for i, item in enumerate(matched_items[:20], 1):  # 限制最多20条
-                    # 添加序号、来源和超链接到内容
-                    content += f"\n{i}. [{item['source_name']}] [{item['title']}]({item['link']})\n"
-                    
-                if len(matched_items) > 20:
-                    content += f"\n... 还有 {len(matched_items) - 20} 条内容"
-                    
-                # 发送推送
-                self.push_manager.send_bulk_push(push_channels, title, content)
+            self.send_item_push(push_channels, matched_items, self._keyword_message_builder(keyword_expr))
+    
+    @staticmethod
+    def _keyword_message_builder(keyword_expr: str) -> Callable[[List[Dict]], Tuple[str, str]]:
+        """返回生成关键词推送标题和内容的函数"""
+        from push import PushContentBuilder
+        
+        def build_message(matched_items: List[Dict]) -> Tuple[str, str]:
+            # 构造推送标题和内容，最多列出20条
+            first_keyword = keyword_expr.split()[0]  # 取第一个关键词作为标题的一部分
+            builder = PushContentBuilder(max_items=20)
+            for item in matched_items:
+                # 添加序号、来源和超链接到内容
+                builder.add_link(item['title'], item['link'], prefix=f"[{item['source_name']}] ")
+            title = f"[FeedGrep关键词] {first_keyword} 有 {builder.count} 条新内容"
+            content = builder.build()
+            if builder.truncated:
+                content += f"\n... 还有 {builder.count - builder.shown} 条内容"
+            return title, content
+        return build_message
 
     def search_items_by_keyword(self, keyword):
         """
-        根据关键词搜索新条目
+        在本轮新保存的条目中搜索关键词
         
         Args:
             keyword: 关键词表达式
@@ -386,70 +984,420 @@ class FeedGrepProcessor:
             匹配的条目列表
         """
         try:
-            # 解析关键词语法
-            required_keywords = []  # 必须包含的关键词 (+)
-            excluded_keywords = []  # 必须排除的关键词 (-)
-            normal_keywords = []    # 普通关键词 (空格分隔)
-            
-            # 解析关键词
-            parts = keyword.split()
-            for part in parts:
-                if part.startswith('+'):
-                    required_keywords.append(part[1:])  # 去掉+号
-                elif part.startswith('-'):
-                    excluded_keywords.append(part[1:])  # 去掉-号
-                else:
-                    normal_keywords.append(part)
-
-            # 构建查询语句
-            query_conditions = ["batch_id = ?"]  # 只查找当前批次的新内容
-            params = [self.current_batch_id]
-            
-            # 处理普通关键词 (OR关系)
-            if normal_keywords:
-                or_conditions = []
-                for kw in normal_keywords:
-                    or_conditions.append("(title LIKE ? OR description LIKE ?)")
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                query_conditions.append("(" + " OR ".join(or_conditions) + ")")
-            
-            # 处理必须关键词 (AND关系)
-            for kw in required_keywords:
-                query_conditions.append("(title LIKE ? OR description LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
-            
-            # 处理排除关键词
-            for kw in excluded_keywords:
-                query_conditions.append("(title NOT LIKE ? AND description NOT LIKE ?)")
-                params.extend([f"%{kw}%", f"%{kw}%"])
+            # 每轮抓取有独立的batch_id；本轮条目ID递增，只访问包含本轮条目的分区
+            since_id = self.cycle_first_item_id - 1 if self.cycle_first_item_id is not None else None
+            return self.storage.fetch_items(
+                batch_id=self.current_batch_id, since_id=since_id, keyword=self._compile_keyword(keyword)
+            )
+        except Exception as e:
+            log.error(f"搜索关键词 '{keyword}' 时出错: {e}")
+            return []
+    
+    def _compile_keyword(self, keyword: str) -> Tuple[str, List[str]]:
+        """编译关键词表达式，相同表达式只编译一次"""
+        if keyword not in self._keyword_rule_cache:
+            self._keyword_rule_cache[keyword] = compile_keyword_expression(keyword)
+        return self._keyword_rule_cache[keyword]
+    
+    @staticmethod
+    def _build_feed_index(config: Dict) -> Dict[Tuple[str, str], Dict]:
+        """构建 (分类, 源名称) -> RSS源配置 的索引"""
+        feed_index = {}
+        for category, feeds in (config.get('categories', {}) or {}).items():
+            for feed in feeds or []:
+                feed_index[(category, feed.get('name', 'Unknown'))] = feed
+        return feed_index
+    
+    def _build_keyword_rules(self, config: Dict) -> List[Dict]:
+        """
+        构建关键词规则列表，兼容字符串和带推送渠道的字典两种格式
+        
+        Returns:
+            规则列表，每条规则包含keywords和push_channels
+        """
+        rules = []
+        for keyword_config in config.get('default_keywords', []) or []:
+            if isinstance(keyword_config, dict):
+                keyword_expr = keyword_config.get('keywords', '')
+                push_channels = keyword_config.get('push_channels', []) or []
+            else:
+                keyword_expr = keyword_config
+                push_channels = []
+            if not keyword_expr:
+                continue
             
-            # 基础查询
-            query = "SELECT * FROM feedgrep_items WHERE " + " AND ".join(query_conditions)
-            query += " ORDER BY created_at DESC"
+            # 预先编译，未变化的表达式直接命中缓存
+            self._compile_keyword(keyword_expr)
+            rules.append({
+                'keywords': keyword_expr,
+                'push_channels': push_channels
+            })
+        
+        # 清理已不再使用的编译缓存
+        used = {rule['keywords'] for rule in rules}
+        self._keyword_rule_cache = {k: v for k, v in self._keyword_rule_cache.items() if k in used}
+        return rules
+    
+    def reload_config(self) -> Dict:
+        """
+        重新加载配置文件，只应用变化的部分
+        
+        新增/删除/修改的RSS源在下一轮抓取中生效，变化的关键词规则重新编译，
+        推送配置变化时重建推送管理器，抓取间隔变化时重新安排定时任务
+        
+        Returns:
+            变更摘要
+        """
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            new_config = yaml.safe_load(f)
+        
+        # RSS源变化
+        new_feeds = self._build_feed_index(new_config)
+        added_feeds = new_feeds.keys() - self.feed_configs.keys()
+        removed_feeds = self.feed_configs.keys() - new_feeds.keys()
+        changed_feeds = {key for key in new_feeds.keys() & self.feed_configs.keys()
+                         if new_feeds[key] != self.feed_configs[key]}
+        
+        # 关键词规则变化
+        old_rules = {(rule['keywords'], tuple(rule['push_channels'])) for rule in self.keyword_rules}
+        new_rules = self._build_keyword_rules(new_config)
+        new_rule_keys = {(rule['keywords'], tuple(rule['push_channels'])) for rule in new_rules}
+        
+        # 推送配置变化时重建推送路由
+        push_changed = new_config.get('push') != self.config.get('push')
+        if push_changed:
+            self._push_manager = None
+        
+        # 抓取配置变化时重建抓取客户端
+        if new_config.get('fetch') != self.config.get('fetch'):
+            from fetcher import FeedFetcher
+            self.fetcher.close()
+            self.fetcher = FeedFetcher(new_config)
+        
+        interval_changed = new_config.get('interval_minutes', 30) != self.config.get('interval_minutes', 30)
+        
+        self.config = new_config
+        configure_logging(new_config.get('logging'))
+        self.feed_configs = new_feeds
+        self.keyword_rules = new_rules
+        
+        if interval_changed and self.scheduler_job is not None:
+            import schedule
+            schedule.cancel_job(self.scheduler_job)
+            self.scheduler_job = schedule.every(self.config.get('interval_minutes', 30)).minutes.do(self.process_all_feeds)
+        
+        if (self.config.get('distributed', {}) or {}).get('enabled', False) and (added_feeds or removed_feeds or changed_feeds):
+            self.sync_feed_leases()
+        
+        summary = {
+            'feeds_added': len(added_feeds),
+            'feeds_removed': len(removed_feeds),
+            'feeds_changed': len(changed_feeds),
+            'keywords_added': len(new_rule_keys - old_rules),
+            'keywords_removed': len(old_rules - new_rule_keys),
+            'push_changed': push_changed,
+            'interval_changed': interval_changed
+        }
+        log.info(f"Config reloaded: {summary}")
+        return summary
+    
+    def check_config_reload(self) -> bool:
+        """
+        检查配置文件是否被修改，修改后重新加载
+        
+        Returns:
+            重新加载成功返回True
+        """
+        try:
+            mtime = os.path.getmtime(self.config_path)
+            if mtime == self.config_mtime:
+                return False
+            self.config_mtime = mtime
+            self.reload_config()
+            return True
+        except Exception as e:
+            # 配置有误时保留原配置继续运行
+            log.error(f"Error reloading config {self.config_path}: {e}")
+            return False
+    
+    def acquire_scheduler_lock(self) -> bool:
+        """
+        尝试获取或续期调度锁
+        
+        Returns:
+            获取成功返回True，锁被其他未过期的进程持有时返回False
+        """
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0, isolation_level=None)
+            try:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                now = time.time()
+                cursor.execute('SELECT owner, expires_at FROM feedgrep_locks WHERE name = ?', ('scheduler',))
+                row = cursor.fetchone()
+                
+                if row and row[0] != self.lock_owner and row[1] > now:
+                    cursor.execute('ROLLBACK')
+                    return False
+                
+                cursor.execute(
+                    'INSERT OR REPLACE INTO feedgrep_locks (name, owner, expires_at) VALUES (?, ?, ?)',
+                    ('scheduler', self.lock_owner, now + self.SCHEDULER_LOCK_TTL)
+                )
+                cursor.execute('COMMIT')
+                return True
+            finally:
+                conn.close()
+        except Exception as e:
+            log.error(f"Error acquiring scheduler lock: {e}")
+            return False
+    
+    def release_scheduler_lock(self):
+        """释放当前进程持有的调度锁"""
+        self.scheduler_lock_held = False
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            conn.execute('DELETE FROM feedgrep_locks WHERE name = ? AND owner = ?', ('scheduler', self.lock_owner))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            log.error(f"Error releasing scheduler lock: {e}")
+    
+    def wait_for_scheduler_lock(self):
+        """阻塞直到获取调度锁，获取后启动心跳线程定期续期"""
+        waiting_logged = False
+        while not self.acquire_scheduler_lock():
+            if not waiting_logged:
+                log.info("Another scheduler is active, standing by...")
+                waiting_logged = True
+            time.sleep(self.SCHEDULER_LOCK_TTL / 4)
+        
+        self._on_scheduler_lock_acquired()
+    
+    def _on_scheduler_lock_acquired(self):
+        """标记持有调度锁并启动心跳线程"""
+        self.scheduler_lock_held = True
+        log.info(f"Scheduler lock acquired by {self.lock_owner}")
+        threading.Thread(target=self._scheduler_lock_heartbeat, daemon=True).start()
+    
+    def _scheduler_lock_heartbeat(self):
+        """调度锁心跳，抓取耗时较长时也能按时续期，续期失败则标记锁已丢失"""
+        while self.scheduler_lock_held:
+            time.sleep(self.SCHEDULER_LOCK_TTL / 3)
+            if self.scheduler_lock_held and not self.acquire_scheduler_lock():
+                log.warning("Scheduler lock lost")
+                self.scheduler_lock_held = False
+    
+    def sync_feed_leases(self):
+        """将配置中的RSS源同步到租约表，新增的源立即到期，已删除的源被移除"""
+        feeds = []
+        for category, category_feeds in self.config.get('categories', {}).items():
+            for feed in category_feeds:
+                if feed.get('url'):
+                    feeds.append((feed.get('name', 'Unknown'), category, feed['url']))
+        
+        conn = sqlite3.connect(self.db_path, timeout=20.0)
+        cursor = conn.cursor()
+        for source_name, category, url in feeds:
+            cursor.execute(
+                'INSERT OR IGNORE INTO feedgrep_feed_leases (source_name, category, url, next_due_at) VALUES (?, ?, ?, 0)',
+                (source_name, category, url)
+            )
+            cursor.execute(
+                'UPDATE feedgrep_feed_leases SET category = ?, url = ? WHERE source_name = ?',
+                (category, url, source_name)
+            )
+        names = [feed[0] for feed in feeds]
+        cursor.execute(
+            f"DELETE FROM feedgrep_feed_leases WHERE source_name NOT IN ({', '.join('?' * len(names))})",
+            names
+        )
+        conn.commit()
+        conn.close()
+    
+    def claim_due_feeds(self, limit: int, lease_seconds: float) -> List[Dict]:
+        """
+        原子地认领到期且未被其他worker持有（或租约已过期）的RSS源
+        
+        Args:
+            limit: 最多认领数量
+            lease_seconds: 租约时长（秒）
             
-            # 执行查询
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
+        Returns:
+            认领到的RSS源列表
+        """
+        conn = sqlite3.connect(self.db_path, timeout=20.0, isolation_level=None)
+        try:
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            # 获取结果
+            cursor.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            cursor.execute('''
+                SELECT source_name, category, url FROM feedgrep_feed_leases
+                WHERE next_due_at <= ? AND (lease_owner IS NULL OR lease_expires_at < ?)
+                ORDER BY next_due_at LIMIT ?
+            ''', (now, now, limit))
             rows = cursor.fetchall()
-            items = [dict(row) for row in rows]
             
+            for source_name, _, _ in rows:
+                cursor.execute(
+                    'UPDATE feedgrep_feed_leases SET lease_owner = ?, lease_expires_at = ?, heartbeat_at = ? WHERE source_name = ?',
+                    (self.lock_owner, now + lease_seconds, now, source_name)
+                )
+            cursor.execute('COMMIT')
+            return [{'source_name': r[0], 'category': r[1], 'url': r[2]} for r in rows]
+        finally:
             conn.close()
+    
+    def renew_feed_leases(self, source_names: List[str], lease_seconds: float):
+        """为当前worker仍在处理的RSS源续期租约"""
+        if not source_names:
+            return
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=20.0)
+        conn.execute(
+            f"UPDATE feedgrep_feed_leases SET lease_expires_at = ?, heartbeat_at = ? "
+            f"WHERE lease_owner = ? AND source_name IN ({', '.join('?' * len(source_names))})",
+            [now + lease_seconds, now, self.lock_owner] + list(source_names)
+        )
+        conn.commit()
+        conn.close()
+    
+    def release_feed_lease(self, source_name: str, next_due_at: float):
+        """释放RSS源租约并设置下次到期时间"""
+        conn = sqlite3.connect(self.db_path, timeout=20.0)
+        conn.execute(
+            'UPDATE feedgrep_feed_leases SET lease_owner = NULL, lease_expires_at = NULL, next_due_at = ? '
+            'WHERE source_name = ? AND lease_owner = ?',
+            (next_due_at, source_name, self.lock_owner)
+        )
+        conn.commit()
+        conn.close()
+    
+    def _start_lease_heartbeat(self, active_feeds: set, lease_seconds: float):
+        """启动心跳线程，为正在处理的RSS源续期租约"""
+        def heartbeat():
+            while True:
+                time.sleep(lease_seconds / 3)
+                try:
+                    self.renew_feed_leases(list(active_feeds), lease_seconds)
+                except Exception as e:
+                    log.error(f"Error renewing feed leases: {e}")
+        
+        threading.Thread(target=heartbeat, daemon=True).start()
+    
+    def process_claimed_feeds(self, limit: int, lease_seconds: float, active_feeds: set) -> int:
+        """
+        认领一批到期的RSS源并处理，处理完后释放租约并执行关键词推送
+        
+        Args:
+            limit: 最多认领数量
+            lease_seconds: 租约时长（秒）
+            active_feeds: 正在处理的RSS源集合，供心跳线程续期
             
-            return items
+        Returns:
+            本轮认领的RSS源数量
+        """
+        interval_seconds = self.config.get('interval_minutes', 30) * 60
+        try:
+            claimed = self.claim_due_feeds(limit, lease_seconds)
         except Exception as e:
-            log.error(f"搜索关键词 '{keyword}' 时出错: {e}")
-            return []
+            log.error(f"Error claiming feeds: {e}")
+            return 0
+        if not claimed:
+            return 0
+        
+        self.start_ingest_run()
+        errors_before = len(self.cycle_errors)
+        active_feeds.update(feed['source_name'] for feed in claimed)
+        
+        for feed in claimed:
+            try:
+                self.process_feed(feed['url'], feed['category'], feed['source_name'])
+            except Exception as e:
+                log.error(f"Failed to process feed {feed['source_name']} ({feed['url']}): {e}")
+                self.cycle_errors.append((feed['source_name'], str(e)))
+            finally:
+                active_feeds.discard(feed['source_name'])
+                self.release_feed_lease(feed['source_name'], time.time() + interval_seconds)
+        
+        # 关键词推送只针对本worker本轮保存的条目
+        self.process_keyword_pushes()
+        self.prune_indexes()
+        self.finish_ingest_run(self.cycle_errors[errors_before:])
+        return len(claimed)
+    
+    def start_lease_worker(self):
+        """
+        以分布式模式运行：循环认领到期的RSS源，处理后释放租约
+        
+        多个worker可以同时运行，每个RSS源同一时间只会被一个worker处理，
+        worker崩溃后其持有的租约会在过期后被其他worker重新认领
+        """
+        distributed_config = self.config.get('distributed', {}) or {}
+        claim_batch_size = distributed_config.get('claim_batch_size', 5)
+        lease_seconds = distributed_config.get('lease_seconds', 300)
+        poll_seconds = distributed_config.get('poll_seconds', 30)
+        self.sync_feed_leases()
+        log.info(f"Lease worker {self.lock_owner} started. Claiming up to {claim_batch_size} feeds at a time.")
+        
+        active_feeds = set()
+        self._start_lease_heartbeat(active_feeds, lease_seconds)
+        
+        while True:
+            self.check_config_reload()
+            self.cycle_errors = []
+            if not self.process_claimed_feeds(claim_batch_size, lease_seconds, active_feeds):
+                time.sleep(poll_seconds)
+    
+    def run_once(self) -> int:
+        """
+        执行一轮抓取后返回，适用于cron等定时任务
+        
+        Returns:
+            退出码：0全部成功，1有RSS源抓取失败，2其他调度器正在运行
+        """
+        self.cycle_errors = []
+        distributed_config = self.config.get('distributed', {}) or {}
+        
+        if distributed_config.get('enabled', False):
+            # 分布式模式下处理所有已到期的RSS源，直到没有可认领的源
+            lease_seconds = distributed_config.get('lease_seconds', 300)
+            self.sync_feed_leases()
+            active_feeds = set()
+            self._start_lease_heartbeat(active_feeds, lease_seconds)
+            while self.process_claimed_feeds(distributed_config.get('claim_batch_size', 5), lease_seconds, active_feeds):
+                pass
+        else:
+            if not self.acquire_scheduler_lock():
+                log.warning("Another scheduler is active, skipping this run")
+                return 2
+            self._on_scheduler_lock_acquired()
+            try:
+                self.process_all_feeds()
+            finally:
+                self.release_scheduler_lock()
+        
+        if self.cycle_errors:
+            log.warning(f"Run finished with {len(self.cycle_errors)} failed feeds")
+            return 1
+        return 0
     
     def start_scheduler(self):
-        """启动定时调度器"""
+        """启动定时调度器，同一数据库上只有持有调度锁的进程会执行抓取"""
+        # 分布式模式下由租约表分配RSS源，不需要调度锁
+        if (self.config.get('distributed', {}) or {}).get('enabled', False):
+            self.start_lease_worker()
+            return
+        
+        import schedule
+        
         interval = self.config.get('interval_minutes', 30)
         
+        # 获取调度锁，其他调度器运行时在此等待
+        self.wait_for_scheduler_lock()
+        
         # 安排定时任务
-        schedule.every(interval).minutes.do(self.process_all_feeds)
+        self.scheduler_job = schedule.every(interval).minutes.do(self.process_all_feeds)
         
         # 立即执行一次
         self.process_all_feeds()
@@ -457,9 +1405,15 @@ class FeedGrepProcessor:
         log.info(f"Scheduler started. Checking RSS feeds every {interval} minutes.")
         
         # 持续运行调度器
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # 每分钟检查一次是否有需要运行的任务
+        try:
+            while True:
+                if not self.scheduler_lock_held:
+                    self.wait_for_scheduler_lock()
+                self.check_config_reload()
+                schedule.run_pending()
+                time.sleep(60)  # 每分钟检查一次是否有需要运行的任务
+        finally:
+            self.release_scheduler_lock()
     
     def start_scheduler_async(self):
         """异步启动定时调度器"""
@@ -468,31 +1422,116 @@ class FeedGrepProcessor:
         return scheduler_thread
 
 
+def run_api(args):
+    """启动API服务"""
+    try:
+        from api import FeedGrepAPI
+        api = FeedGrepAPI('feedgrep.yaml')
+        log.info(f"Starting API server on {args.host}:{args.port}")
+        api.run(host=args.host, port=args.port, workers=args.workers)
+    except ImportError as e:
+        log.error(f"无法导入API模块: {e}")
+        sys.exit(1)
+
+
+def run_backup(args):
+    """执行备份或恢复后退出"""
+    from backup import BackupManager
+    with open('feedgrep.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    configure_logging(config.get('logging'))
+    manager = BackupManager(config)
+    try:
+        if args.mode == 'backup':
+            manifest = manager.create_backup()
+        else:
+            manifest = manager.restore(args.snapshot)
+        print(json.dumps(manifest, ensure_ascii=False, indent=2))
+    except Exception as e:
+        log.error(f"{args.mode} failed: {e}")
+        sys.exit(1)
+
+
+def run_import(args):
+    """导入OPML订阅列表或回填RSS文件后退出"""
+    if args.mode == 'import':
+        from importer import import_opml
+        try:
+            added, skipped = import_opml('feedgrep.yaml', args.opml, args.category or 'imported')
+        except Exception as e:
+            log.error(f"import failed: {e}")
+            sys.exit(1)
+        log.info(f"Imported {added} feeds from {args.opml}, {skipped} already configured")
+        return
+    
+    processor = FeedGrepProcessor('feedgrep.yaml')
+    processor.backfill(args.dir, category=args.category, source_name=args.source, processes=args.processes,
+                       batch_size=args.batch_size, skip_push=args.no_push)
+    sys.exit(1 if processor.cycle_errors else 0)
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='FeedGrep - RSS聚合器')
+    parser.add_argument('mode', nargs='?', default='all', choices=['all', 'worker', 'api', 'backup', 'restore', 'import', 'backfill'],
+                        help='运行模式：all同时运行调度器和API（默认），worker只运行调度器，api只运行API服务，'
+                             'backup在线备份数据库，restore从备份恢复数据库（需先停止服务），'
+                             'import导入OPML订阅列表到配置文件，backfill从本地RSS文件回填历史条目')
     parser.add_argument('--host', default='0.0.0.0', help='API服务监听地址')
     parser.add_argument('--port', type=int, default=8000, help='API服务端口')
+    parser.add_argument('--workers', type=int, default=None, help='API服务worker进程数，默认读取配置api.workers')
+    parser.add_argument('--once', action='store_true', help='只执行一轮抓取和推送后退出，不启动API服务，适用于cron')
+    parser.add_argument('--snapshot', default=None, help='restore模式使用的备份名称，默认最新备份')
+    parser.add_argument('--opml', default=None, help='import模式读取的OPML文件')
+    parser.add_argument('--dir', default=None, help='backfill模式读取的RSS文件目录')
+    parser.add_argument('--category', default=None, help='导入或回填的默认分类')
+    parser.add_argument('--source', default=None, help='backfill模式的默认源名称，默认使用RSS源标题')
+    parser.add_argument('--processes', type=int, default=None, help='backfill模式的解析进程数，默认CPU核数')
+    parser.add_argument('--batch-size', type=int, default=5000, help='backfill模式每个事务保存的最大条目数')
+    parser.add_argument('--no-push', action='store_true', help='backfill模式不推送，也不执行关键词推送')
     
     args = parser.parse_args()
     
+    if args.mode in ('backup', 'restore'):
+        run_backup(args)
+        return
+    
+    if args.mode in ('import', 'backfill'):
+        if not (args.opml if args.mode == 'import' else args.dir):
+            parser.error(f"{args.mode} 模式需要 {'--opml' if args.mode == 'import' else '--dir'} 参数")
+        run_import(args)
+        return
+    
+    if args.once:
+        # 只导入抓取需要的模块，不导入API
+        processor = FeedGrepProcessor('feedgrep.yaml')
+        log.info(f"Startup finished in {time.perf_counter() - _START_TIME:.3f}s")
+        exit_code = processor.run_once()
+        log.info(f"Run finished in {time.perf_counter() - _START_TIME:.3f}s with exit code {exit_code}")
+        sys.exit(exit_code)
+    
+    if args.mode == 'api':
+        run_api(args)
+        return
+    
     # 创建FeedGrep处理器实例
     processor = FeedGrepProcessor('feedgrep.yaml')
     
+    if args.mode == 'worker':
+        # 只运行调度器，前台阻塞
+        try:
+            processor.start_scheduler()
+        except KeyboardInterrupt:
+            log.info("Scheduler stopped")
+        return
+    
     # 异步启动定时调度器
     scheduler_thread = processor.start_scheduler_async()
     log.info("Scheduler started in background thread")
     
     # 启动API服务
-    try:
-        from api import FeedGrepAPI
-        api = FeedGrepAPI('feedgrep.yaml')
-        log.info(f"Starting API server on {args.host}:{args.port}")
-        api.run(host=args.host, port=args.port)
-    except ImportError as e:
-        log.error(f"无法导入API模块: {e}")
-        sys.exit(1)
+    run_api(args)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
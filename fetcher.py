@@ -0,0 +1,84 @@
+import time
+import threading
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from utils.Logger import get_logger
+
+
+log = get_logger(__name__)
+
+
+class FeedFetcher:
+    def __init__(self, config):
+        """
+        RSS源抓取客户端，按主机复用keep-alive连接并限制访问频率
+        
+        Args:
+            config: 完整配置，读取其中的fetch部分
+        """
+        fetch_config = config.get('fetch', {}) or {}
+        self.connect_timeout = fetch_config.get('connect_timeout', 10)
+        self.read_timeout = fetch_config.get('read_timeout', 30)
+        # 每个主机的最大并发请求数
+        self.per_host_concurrency = fetch_config.get('per_host_concurrency', 2)
+        # 同一主机两次请求之间的最小间隔（秒）
+        self.per_host_min_interval = fetch_config.get('per_host_min_interval', 1.0)
+        self.user_agent = fetch_config.get('user_agent', 'FeedGrep/1.0 (+https://github.com/zdx0122/feedgrep)')
+        
+        # 连接池按主机划分，每个主机保留的连接数与并发上限一致
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.per_host_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = self.user_agent
+        
+        self._lock = threading.Lock()
+        self._host_semaphores = {}
+        self._host_next_slot = {}
+    
+    def _get_semaphore(self, host: str) -> threading.Semaphore:
+        """获取主机对应的并发信号量"""
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+            return self._host_semaphores[host]
+    
+    def _wait_for_slot(self, host: str):
+        """按主机预约请求时间，保证同一主机的请求间隔不小于最小间隔"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._host_next_slot.get(host, 0))
+            self._host_next_slot[host] = slot + self.per_host_min_interval
+        
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+    
+    def fetch(self, url: str) -> Tuple[bytes, Dict[str, str]]:
+        """
+        抓取RSS源原始内容
+        
+        Args:
+            url: RSS源地址
+            
+        Returns:
+            (响应内容, 响应头)，响应头中附带content-location供feedparser解析相对链接
+            
+        Raises:
+            requests.RequestException: 网络错误或HTTP错误状态
+        """
+        host = urlsplit(url).netloc.lower()
+        with self._get_semaphore(host):
+            self._wait_for_slot(host)
+            response = self.session.get(url, timeout=(self.connect_timeout, self.read_timeout))
+            response.raise_for_status()
+        
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        headers['content-location'] = response.url
+        return response.content, headers
+    
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
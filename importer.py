@@ -0,0 +1,204 @@
+import os
+import re
+import gzip
+import yaml
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+# 回填时识别的RSS文件扩展名，可再加.gz压缩
+FEED_FILE_EXTENSIONS = ('.xml', '.rss', '.atom', '.feed')
+
+
+def parse_opml(opml_path: str, default_category: str = 'imported') -> Dict[str, List[Dict]]:
+    """
+    解析OPML订阅列表
+
+    带xmlUrl的outline为RSS源，其所在的上级outline文本作为分类名，
+    没有上级分类的RSS源归入default_category
+
+    Args:
+        opml_path: OPML文件路径
+        default_category: 顶层RSS源的分类
+
+    Returns:
+        分类名 -> [{'name': 源名称, 'url': 源地址}] 的字典，保持文件中的顺序
+    """
+    root = ET.parse(opml_path).getroot()
+    body = root.find('body')
+    categories = {}
+
+    def walk(node, category):
+        for outline in node.findall('outline'):
+            url = outline.get('xmlUrl')
+            name = (outline.get('title') or outline.get('text') or '').strip()
+            if url:
+                categories.setdefault(category, []).append({'name': name or url, 'url': url.strip()})
+            else:
+                walk(outline, name or category)
+
+    walk(body if body is not None else root, default_category)
+    return categories
+
+
+def _yaml_scalar(value: str) -> str:
+    """把字符串转为单行YAML标量，必要时加引号"""
+    return yaml.safe_dump(value, allow_unicode=True, default_flow_style=True, width=float('inf')).strip().removesuffix('...').strip()
+
+
+def _feed_lines(feed: Dict, push_channels: List[str]) -> List[str]:
+    """按feedgrep.yaml中已有的缩进格式生成一个RSS源的配置行"""
+    lines = [f"    - name: {_yaml_scalar(feed['name'])}", f"      url: {_yaml_scalar(feed['url'])}"]
+    if push_channels:
+        lines.append("      push_channels:")
+        lines.extend(f"        - {_yaml_scalar(channel)}" for channel in push_channels)
+    return lines
+
+
+def import_opml(config_path: str, opml_path: str, default_category: str = 'imported',
+                push_channels: Optional[List[str]] = None) -> Tuple[int, int]:
+    """
+    把OPML中的RSS源追加到配置文件的categories段
+
+    直接在原文件中插入配置行，保留已有的注释和格式；地址已存在的源跳过，
+    名称与已有源重复时加序号。运行中的服务会通过配置热加载读取新的源
+
+    Args:
+        config_path: 配置文件路径
+        opml_path: OPML文件路径
+        default_category: 顶层RSS源的分类
+        push_channels: 为导入的源配置的推送渠道
+
+    Returns:
+        (新增源数量, 跳过源数量)
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    config = yaml.safe_load(text) or {}
+    existing = config.get('categories', {}) or {}
+    if 'categories' not in config:
+        raise ValueError("配置文件中没有categories段")
+
+    known_urls = {feed.get('url') for feeds in existing.values() for feed in feeds or []}
+    known_names = {feed.get('name') for feeds in existing.values() for feed in feeds or []}
+
+    added, skipped = {}, 0
+    for category, feeds in parse_opml(opml_path, default_category).items():
+        for feed in feeds:
+            if feed['url'] in known_urls:
+                skipped += 1
+                continue
+            # 源名称是条目、租约和健康状态的键，必须唯一
+            name, suffix = feed['name'], 1
+            while name in known_names:
+                suffix += 1
+                name = f"{feed['name']} ({suffix})"
+            known_urls.add(feed['url'])
+            known_names.add(name)
+            added.setdefault(category, []).append({'name': name, 'url': feed['url']})
+
+    if not added:
+        return 0, skipped
+
+    lines = text.split('\n')
+    start = next(i for i, line in enumerate(lines) if re.match(r'categories:\s*(#.*)?$', line))
+    # categories段到下一个顶层键为止
+    end = next((i for i in range(start + 1, len(lines)) if re.match(r'[A-Za-z_]', lines[i])), len(lines))
+
+    def last_content_line(begin: int, stop: int) -> int:
+        """区间内最后一个非空、非注释的行"""
+        for i in range(stop - 1, begin - 1, -1):
+            if lines[i].strip() and not lines[i].lstrip().startswith('#'):
+                return i
+        return begin
+
+    # 倒序插入，先插入的位置不影响后面要查找的行号
+    inserts = []
+    for category, feeds in added.items():
+        new_lines = [line for feed in feeds for line in _feed_lines(feed, push_channels or [])]
+        header = next((i for i in range(start + 1, end)
+                       if re.match(rf'  {re.escape(_yaml_scalar(category))}:\s*(#.*)?$', lines[i])), None)
+        if header is not None and existing.get(category) is not None:
+            block_end = next((i for i in range(header + 1, end) if re.match(r'  \S', lines[i]) and not lines[i].startswith('  #')), end)
+            inserts.append((last_content_line(header, block_end) + 1, new_lines))
+        else:
+            inserts.append((last_content_line(start, end) + 1, [f"  {_yaml_scalar(category)}:"] + new_lines))
+    for position, new_lines in sorted(inserts, key=lambda insert: insert[0], reverse=True):
+        lines[position:position] = new_lines
+
+    new_text = '\n'.join(lines)
+    # 写入前确认新配置可以解析且包含全部新增的源
+    new_config = yaml.safe_load(new_text)
+    new_urls = {feed.get('url') for feeds in new_config['categories'].values() for feed in feeds or []}
+    if not all(feed['url'] in new_urls for feeds in added.values() for feed in feeds):
+        raise ValueError("生成的配置文件校验失败，未写入")
+
+    tmp_path = config_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(new_text)
+    os.replace(tmp_path, config_path)
+    return sum(len(feeds) for feeds in added.values()), skipped
+
+
+def find_feed_files(directory: str) -> List[str]:
+    """递归查找目录下的RSS文件（含.gz压缩文件），按路径排序"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            name = filename[:-3] if filename.endswith('.gz') else filename
+            if name.lower().endswith(FEED_FILE_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+
+def pub_date_to_created_at(pub_date: str) -> Optional[str]:
+    """
+    把RSS（RFC 822）或Atom（ISO 8601）的发布时间转为UTC入库时间
+
+    Args:
+        pub_date: 发布时间字符串
+
+    Returns:
+        YYYY-MM-DD HH:MM:SS格式的UTC时间，无法解析或晚于当前时间时返回None
+    """
+    if not pub_date:
+        return None
+    try:
+        published = parsedate_to_datetime(pub_date)
+    except (TypeError, ValueError):
+        try:
+            published = datetime.fromisoformat(pub_date)
+        except ValueError:
+            return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    published = published.astimezone(timezone.utc)
+    if published > datetime.now(timezone.utc):
+        return None
+    return published.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_feed_file(path: str):
+    """
+    读取并解析单个RSS文件，在进程池中执行
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        (文件路径, 源标题, 条目列表)，条目的入库时间取发布时间；
+        解析失败时条目列表为None、源标题为错误信息
+    """
+    from feedgrep import parse_feed
+
+    try:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            content = f.read()
+        title, items = parse_feed(content)
+        for item in items:
+            item.created_at = pub_date_to_created_at(item.pub_date)
+        return path, title, items
+    except Exception as e:
+        return path, str(e), None
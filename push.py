@@ -232,4 +232,42 @@ class PushManager:
         for channel in channels:
             if self.send_push(channel, title, content):
                 success_count += 1
-        return success_count
\ No newline at end of file
+        return success_count
+
+
+class PushContentBuilder:
+    def __init__(self, max_length: int = 20000, max_items: int = None):
+        """
+        增量构建推送内容，达到长度或条数上限后只计数不再拼接
+        
+        Args:
+            max_length: 内容长度上限，超过后停止拼接
+            max_items: 条目数量上限，为空时不限制
+        """
+        self.max_length = max_length
+        self.max_items = max_items
+        self.parts = []
+        self.length = 0
+        self.count = 0   # 已添加的条目总数
+        self.shown = 0   # 实际拼接到内容中的条目数
+    
+    @property
+    def truncated(self) -> bool:
+        return self.shown < self.count
+    
+    def _is_full(self) -> bool:
+        return self.length > self.max_length or (self.max_items is not None and self.shown >= self.max_items)
+    
+    def add_link(self, title: str, link: str, prefix: str = ''):
+        """添加一条带序号的Markdown链接"""
+        self.count += 1
+        if self._is_full():
+            return
+        line = f"\n{self.count}. {prefix}[{title}]({link})\n"
+        self.parts.append(line)
+        self.length += len(line)
+        self.shown += 1
+    
+    def build(self) -> str:
+        """返回已拼接的内容"""
+        return ''.join(self.parts)
@@ -0,0 +1,742 @@
+import os
+import re
+import glob
+import time
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from utils.Logger import get_logger
+
+log = get_logger(__name__)
+
+
+# feedgrep_items表的全部列
+ITEM_COLUMNS = ['id', 'title', 'link', 'description', 'pub_date', 'guid',
+                'category', 'source_name', 'batch_id', 'created_at', 'cluster_id']
+
+# 列表查询的排序方式：newest按入库时间倒序，id按主键升序（增量同步和导出）
+ORDER_CLAUSES = {
+    'newest': 'created_at DESC',
+    'id': 'id',
+}
+
+
+def compile_keyword_expression(keyword: str) -> Tuple[str, List[str]]:
+    """
+    将关键词表达式编译为SQL条件
+
+    Args:
+        keyword: 关键词表达式，普通词为OR关系，+前缀为必须词，-前缀为排除词
+
+    Returns:
+        (SQL条件, 参数列表)，没有任何关键词时条件为1=1
+    """
+    required_keywords = []  # 必须包含的关键词 (+)
+    excluded_keywords = []  # 必须排除的关键词 (-)
+    normal_keywords = []    # 普通关键词 (空格分隔)
+
+    # 解析关键词
+    for part in keyword.split():
+        if part.startswith('+'):
+            required_keywords.append(part[1:])  # 去掉+号
+        elif part.startswith('-'):
+            excluded_keywords.append(part[1:])  # 去掉-号
+        else:
+            normal_keywords.append(part)
+
+    conditions = []
+    params = []
+
+    # 处理普通关键词 (OR关系)
+    if normal_keywords:
+        or_conditions = []
+        for kw in normal_keywords:
+            or_conditions.append("(title LIKE ? OR description LIKE ?)")
+            params.extend([f"%{kw}%", f"%{kw}%"])
+        conditions.append("(" + " OR ".join(or_conditions) + ")")
+
+    # 处理必须关键词 (AND关系)
+    for kw in required_keywords:
+        conditions.append("(title LIKE ? OR description LIKE ?)")
+        params.extend([f"%{kw}%", f"%{kw}%"])
+
+    # 处理排除关键词
+    for kw in excluded_keywords:
+        conditions.append("(title NOT LIKE ? AND description NOT LIKE ?)")
+        params.extend([f"%{kw}%", f"%{kw}%"])
+
+    return (" AND ".join(conditions) or "1=1"), params
+
+
+def build_item_query(
+    columns: List[str],
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    keyword: Union[str, Tuple[str, List[str]], None] = None,
+    since: Optional[str] = None,
+    since_id: Optional[int] = None,
+    cluster_id: Optional[int] = None,
+    batch_id: Optional[int] = None,
+    collapse: bool = False,
+    order: str = 'newest',
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Tuple[str, list]:
+    """
+    构建条目查询语句，API和推送共用，对单个分区执行
+
+    Args:
+        columns: 查询的列
+        category: 分类筛选
+        source: 来源筛选
+        keyword: 关键词表达式，或已编译的 (SQL条件, 参数列表)
+        since: 入库时间下限（UTC），如2025-01-01或2025-01-01T08:00:00
+        since_id: 只查询ID大于该值的条目
+        cluster_id: 只查询指定聚类中的条目
+        batch_id: 只查询指定批次的条目
+        collapse: 合并近似重复条目，每个聚类只返回首条并附带cluster_size列
+        order: 排序方式，newest或id
+        limit: 返回数量限制，为空时不限制
+        offset: 偏移量
+
+    Returns:
+        (SQL语句, 参数列表)
+    """
+    select_columns = list(columns)
+    if collapse:
+        # 聚类大小通过cluster_id索引计算
+        select_columns.append(
+            "(SELECT COUNT(*) FROM feedgrep_items c WHERE c.cluster_id = feedgrep_items.id) AS cluster_size")
+    query = f"SELECT {', '.join(select_columns)} FROM feedgrep_items WHERE 1=1"
+    params = []
+
+    if collapse:
+        query += " AND (cluster_id IS NULL OR cluster_id = id)"
+    if batch_id is not None:
+        query += " AND batch_id = ?"
+        params.append(batch_id)
+    if since_id is not None:
+        query += " AND id > ?"
+        params.append(since_id)
+    if cluster_id is not None:
+        query += " AND cluster_id = ?"
+        params.append(cluster_id)
+    if category:
+        query += " AND category = ?"
+        params.append(category)
+    if source:
+        query += " AND source_name = ?"
+        params.append(source)
+    if keyword:
+        keyword_condition, keyword_params = (
+            compile_keyword_expression(keyword) if isinstance(keyword, str) else keyword)
+        query += f" AND {keyword_condition}"
+        params.extend(keyword_params)
+    if since:
+        query += " AND created_at >= ?"
+        params.append(since.replace('T', ' '))
+
+    query += f" ORDER BY {ORDER_CLAUSES[order]}"
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+    return query, params
+
+
+def create_item_table(cursor: sqlite3.Cursor):
+    """在游标所在数据库中创建条目表和索引，旧数据库补充后来新增的字段"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feedgrep_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            link TEXT,
+            description TEXT,
+            pub_date TEXT,
+            guid TEXT,
+            category TEXT,
+            source_name TEXT,
+            batch_id INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 创建索引来提高查询速度
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON feedgrep_items(title)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_guid ON feedgrep_items(guid)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_link ON feedgrep_items(link)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON feedgrep_items(category)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_name ON feedgrep_items(source_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_batch_id ON feedgrep_items(batch_id)')
+
+    # 查重用的复合索引
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_title_link_guid ON feedgrep_items(source_name, title, link, guid)')
+
+    # 为关键词搜索添加复合索引
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON feedgrep_items(created_at DESC)')
+
+    # 为分类和时间组合查询添加索引
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_created_at ON feedgrep_items(category, created_at DESC)')
+
+    # 为来源和时间组合查询添加索引
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_name_created_at ON feedgrep_items(source_name, created_at DESC)')
+
+    # 近似重复聚类：条目的SimHash签名和所属聚类，旧数据库补充字段
+    existing_columns = {row[1] for row in cursor.execute('PRAGMA table_info(feedgrep_items)')}
+    if 'simhash' not in existing_columns:
+        cursor.execute('ALTER TABLE feedgrep_items ADD COLUMN simhash INTEGER')
+    if 'cluster_id' not in existing_columns:
+        cursor.execute('ALTER TABLE feedgrep_items ADD COLUMN cluster_id INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cluster_id ON feedgrep_items(cluster_id)')
+
+
+class SqliteItemStorage:
+    """
+    条目存储：所有条目保存在主数据库的feedgrep_items表中
+
+    条目表的读写都通过本类完成：写入连接中未加库名的feedgrep_items指向当前写入的条目表，
+    其余元数据表（聚类索引、计数器等）同样可见，保存条目和更新元数据在同一连接中完成。
+    读取时调用方按query_plan()返回的顺序逐个分区执行查询并合并结果
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: 主数据库路径
+        """
+        self.db_path = db_path
+
+    def init_schema(self, cursor: sqlite3.Cursor):
+        """在主数据库初始化时创建条目表"""
+        create_item_table(cursor)
+
+    def connect(self) -> sqlite3.Connection:
+        """打开写入连接"""
+        return sqlite3.connect(self.db_path, timeout=20.0)
+
+    def _dedup_schemas(self, conn: sqlite3.Connection) -> List[str]:
+        """查重时需要检查的库名"""
+        return ['main']
+
+    def _begin_write(self, conn: sqlite3.Connection):
+        """写入事务开始前调用，单库的条目ID由SQLite自增分配，无需处理"""
+
+    def _end_write(self, conn: sqlite3.Connection):
+        """写入事务提交前调用"""
+
+    def partitions(self, order: str = 'newest', since: Optional[str] = None,
+                   since_id: Optional[int] = None) -> List[str]:
+        """
+        返回查询需要访问的分区数据库路径，按order对应的顺序排列
+
+        Args:
+            order: newest时新分区在前，id时旧分区在前
+            since: 入库时间下限，早于该时间的分区不访问
+            since_id: ID下限，全部条目ID都不大于该值的分区不访问
+
+        Returns:
+            数据库路径列表
+        """
+        return [self.db_path]
+
+    def database_files(self) -> List[str]:
+        """需要备份的全部数据库文件，主数据库在前"""
+        return [self.db_path]
+
+    def insert_batch(
+        self,
+        items: Iterable,
+        category: str,
+        source_name: str,
+        batch_id: int,
+        on_insert: Optional[Callable[[sqlite3.Cursor, object], None]] = None
+    ) -> List:
+        """
+        在一个事务中批量保存条目，已存在的条目跳过
+
+        查重和插入在同一条语句中完成，多个worker并发写入时每个条目只会保存一次
+
+        Args:
+            items: FeedItem序列，created_at为空时入库时间为当前时间
+            category: 条目所属类别
+            source_name: RSS源名称
+            batch_id: 批次ID
+            on_insert: 每保存一条后在同一事务中调用，参数为游标和已填充id的条目
+
+        Returns:
+            新保存的条目列表，失败时为空
+        """
+        items = list(items)
+        if not items:
+            return []
+        return self._insert_items(self.connect, items, category, source_name, batch_id, on_insert)
+
+    def _insert_items(self, connect: Callable[[], sqlite3.Connection], items: List, category: str,
+                      source_name: str, batch_id: int, on_insert) -> List:
+        """在connect打开的写入连接中以一个事务保存条目，数据库被锁时重试"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            conn = None
+            try:
+                conn = connect()
+                self._begin_write(conn)
+                cursor = conn.cursor()
+                not_exists = " AND ".join(
+                    f"NOT EXISTS (SELECT 1 FROM {schema}.feedgrep_items WHERE source_name = ? AND title = ? AND link = ?)"
+                    for schema in self._dedup_schemas(conn)
+                )
+                dedup_count = not_exists.count('NOT EXISTS')
+
+                inserted = []
+                for item in items:
+                    cursor.execute(f'''
+                        INSERT INTO feedgrep_items (
+                            title, link, description, pub_date, guid, category, source_name, batch_id, created_at
+                        )
+                        SELECT ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP)
+                        WHERE {not_exists}
+                    ''', (
+                        item.title, item.link, item.description, item.pub_date, item.guid,
+                        category, source_name, batch_id, item.created_at
+                    ) + (source_name, item.title, item.link) * dedup_count)
+                    if cursor.rowcount == 0:
+                        continue  # 条目已存在，不需要保存
+                    item.id = cursor.lastrowid
+                    if on_insert is not None:
+                        on_insert(cursor, item)
+                    inserted.append(item)
+
+                self._end_write(conn)
+                conn.commit()
+                conn.close()
+                return inserted
+            except sqlite3.OperationalError as e:
+                if conn is not None:
+                    conn.close()
+                if "database is locked" in str(e) and attempt < max_retries - 1:
+                    time.sleep(1)
+                    continue
+                log.error(f"Error saving items after {attempt+1} attempts: {e}")
+                return []
+            except Exception as e:
+                log.error(f"Unexpected error saving items: {e}")
+                if conn is not None:
+                    conn.close()
+                return []
+        return []
+
+    def query_plan(self, columns: List[str] = ITEM_COLUMNS, limit: Optional[int] = None, offset: int = 0,
+                   **filters) -> List[Tuple[str, str, list]]:
+        """
+        生成条目查询计划：按order对应的顺序列出需要访问的分区及其查询语句
+
+        order为newest时各分区的入库时间不交叠，调用方依次执行各步并合并结果，
+        取够offset+limit条后不再执行后续步骤；order为id时各分区的ID范围可能交叠，
+        需执行全部步骤后按ID排序。会访问数据库文件，异步调用方应在线程池中调用
+
+        Args:
+            columns: 查询的列
+            limit: 返回数量限制，为空时不限制
+            offset: 偏移量
+            filters: build_item_query的筛选和排序参数
+
+        Returns:
+            (分区数据库路径, SQL语句, 参数列表) 列表
+        """
+        needed = None if limit is None else limit + offset
+        return [
+            (path,) + build_item_query(columns, limit=needed, **filters)
+            for path in self.partitions(filters.get('order', 'newest'), filters.get('since'), filters.get('since_id'))
+        ]
+
+    def fetch_items(self, columns: List[str] = ITEM_COLUMNS, limit: Optional[int] = None, offset: int = 0,
+                    **filters) -> List[Dict]:
+        """
+        同步查询条目，按query_plan依次访问各分区并合并结果
+
+        Args:
+            columns: 查询的列
+            limit: 返回数量限制，为空时不限制
+            offset: 偏移量
+            filters: build_item_query的筛选和排序参数
+
+        Returns:
+            条目字典列表
+        """
+        items = []
+        by_id = filters.get('order') == 'id'
+        for path, query, params in self.query_plan(columns, limit, offset, **filters):
+            if limit is not None and not by_id and len(items) >= limit + offset:
+                break
+            conn = sqlite3.connect(path, timeout=20.0)
+            try:
+                conn.row_factory = sqlite3.Row
+                items.extend(dict(row) for row in conn.execute(query, params))
+            finally:
+                conn.close()
+        if by_id:
+            items.sort(key=lambda item: item['id'])
+        return items[offset:] if limit is None else items[offset:offset + limit]
+
+    def count_items(self, column: str, min_hour: Optional[int] = None) -> List[tuple]:
+        """
+        按列统计全部分区的条目数，用于重建分类和来源计数器
+
+        Args:
+            column: 分组列，category或source_name
+            min_hour: 为空时统计总数；否则只统计该小时（Unix时间/3600）之后入库的条目，按批次和小时分组
+
+        Returns:
+            min_hour为空时为 (值, 条数) 列表，否则为 (值, batch_id, 小时, 条数) 列表
+        """
+        if column not in ('category', 'source_name'):
+            raise ValueError(f"不支持的统计列: {column}")
+        if min_hour is None:
+            query, params = f'SELECT {column}, COUNT(*) FROM feedgrep_items GROUP BY {column}', []
+        else:
+            query = f'''
+                SELECT {column}, batch_id, CAST(strftime('%s', created_at) AS INTEGER) / 3600 AS hour, COUNT(*)
+                FROM feedgrep_items WHERE created_at >= datetime(? * 3600, 'unixepoch')
+                GROUP BY {column}, batch_id, hour
+            '''
+            params = [min_hour]
+
+        counts = {}
+        for path in self.partitions():
+            conn = sqlite3.connect(path, timeout=20.0)
+            try:
+                for row in conn.execute(query, params):
+                    counts[row[:-1]] = counts.get(row[:-1], 0) + row[-1]
+            finally:
+                conn.close()
+        return [key + (count,) for key, count in counts.items()]
+
+    def cluster_candidates(self, cursor: sqlite3.Cursor, item_ids: List[int]) -> List[Tuple[int, int, Optional[int]]]:
+        """
+        在保存条目的事务中查询候选条目的SimHash签名和所属聚类，查找范围与查重相同
+
+        Args:
+            cursor: insert_batch传给on_insert的游标
+            item_ids: 候选条目ID
+
+        Returns:
+            (条目ID, SimHash签名, 聚类ID) 列表，已不在查找范围内的条目不返回
+        """
+        if not item_ids:
+            return []
+        candidates = []
+        for schema in self._dedup_schemas(cursor.connection):
+            # 分段查询，参数数量不超过SQLite的上限
+            for start in range(0, len(item_ids), 500):
+                chunk = item_ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT id, simhash, cluster_id FROM {schema}.feedgrep_items
+                    WHERE id IN ({', '.join('?' * len(chunk))}) AND simhash IS NOT NULL
+                ''', chunk)
+                candidates.extend(cursor.fetchall())
+        return candidates
+
+    def set_cluster(self, cursor: sqlite3.Cursor, item_id: int, cluster_id: int, simhash: Optional[int] = None):
+        """在保存条目的事务中写入条目的聚类ID和SimHash签名"""
+        cursor.execute(
+            'UPDATE feedgrep_items SET simhash = COALESCE(?, simhash), cluster_id = ? WHERE id = ?',
+            (simhash, cluster_id, item_id)
+        )
+
+    def max_batch_id(self) -> int:
+        """已保存条目中的最大batch_id，回填会把当前批次写入历史分区，需要检查全部分区"""
+        max_batch_id = 0
+        for path in self.partitions():
+            conn = sqlite3.connect(path, timeout=20.0)
+            try:
+                max_batch_id = max(max_batch_id, conn.execute('SELECT MAX(batch_id) FROM feedgrep_items').fetchone()[0] or 0)
+            finally:
+                conn.close()
+        return max_batch_id
+
+    def drop_partitions(self, retention_months: int) -> List[str]:
+        """单库存储不分区，不删除任何数据"""
+        return []
+
+
+class MonthlyShardedItemStorage(SqliteItemStorage):
+    """
+    按月分区的条目存储：每个月的条目保存在独立的SQLite文件中（如feedgrep_202501.db），
+    主数据库只保存元数据
+
+    条目按入库时间所在月份写入对应分区，写入连接以该分区为主库并附加主数据库；
+    回填的历史条目写入其发布月份的分区，按时间倒序的查询从当月分区开始，取够条数即停止；
+    过期分区直接删除文件。启用前主数据库中已有的条目作为最旧的分区继续可读
+    """
+
+    _PARTITION_RE = re.compile(r'_(\d{6})$')
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        base, self._ext = os.path.splitext(db_path)
+        self._base = base
+        self._prepared = set()      # 已建表的分区路径
+        self._legacy = None
+
+    def init_schema(self, cursor: sqlite3.Cursor):
+        """
+        主数据库不再创建条目表，只记录是否存在启用分区前的旧条目表；
+        创建全局条目ID序列和各分区的最大ID记录，没有记录时从已有分区读取
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedgrep_items'")
+        self._legacy = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_item_sequence (
+                name TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feedgrep_partition_ids (
+                partition TEXT PRIMARY KEY,
+                max_id INTEGER NOT NULL
+            )
+        ''')
+
+        max_seq = 0
+        for path in self._all_partitions():
+            conn = cursor.connection if path == self.db_path else sqlite3.connect(path, timeout=20.0)
+            try:
+                seq = conn.execute("SELECT MAX(seq) FROM sqlite_sequence WHERE name = 'feedgrep_items'").fetchone()[0]
+                max_id = conn.execute('SELECT MAX(id) FROM feedgrep_items').fetchone()[0]
+            except sqlite3.OperationalError:
+                continue    # 分区还没有建表
+            finally:
+                if conn is not cursor.connection:
+                    conn.close()
+            max_seq = max(max_seq, seq or 0)
+            if max_id is not None:
+                # 已有的记录由写入事务维护，不覆盖
+                cursor.execute(
+                    'INSERT OR IGNORE INTO feedgrep_partition_ids (partition, max_id) VALUES (?, ?)',
+                    (self._partition_key(path), max_id)
+                )
+        cursor.execute(
+            "INSERT OR IGNORE INTO feedgrep_item_sequence (name, seq) VALUES ('feedgrep_items', ?)", (max_seq,))
+
+    @property
+    def legacy(self) -> bool:
+        """主数据库中是否有启用分区前的条目"""
+        if self._legacy is None:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            try:
+                self._legacy = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedgrep_items'").fetchone() is not None
+            finally:
+                conn.close()
+        return self._legacy
+
+    def partition_path(self, month: str) -> str:
+        """指定月份（YYYYMM）的分区路径"""
+        return f"{self._base}_{month}{self._ext}"
+
+    def _list_partitions(self) -> List[Tuple[str, str]]:
+        """已有分区的 (月份, 路径)，按月份升序"""
+        partitions = []
+        for path in glob.glob(f"{glob.escape(self._base)}_[0-9][0-9][0-9][0-9][0-9][0-9]{self._ext}"):
+            match = self._PARTITION_RE.search(os.path.splitext(path)[0])
+            if match:
+                partitions.append((match.group(1), path))
+        return sorted(partitions)
+
+    def _all_partitions(self) -> List[str]:
+        """全部分区路径，旧分区在前，启用分区前的主数据库最旧"""
+        paths = [path for _, path in self._list_partitions()]
+        return ([self.db_path] if self.legacy else []) + paths
+
+    def database_files(self) -> List[str]:
+        return [self.db_path] + [path for _, path in self._list_partitions()]
+
+    def _partition_key(self, path: str) -> str:
+        """分区在feedgrep_partition_ids中的键：月份，启用分区前的主数据库为空字符串"""
+        if path == self.db_path:
+            return ''
+        return self._PARTITION_RE.search(os.path.splitext(path)[0]).group(1)
+
+    def _partition_max_ids(self) -> Dict[str, int]:
+        """各分区的最大条目ID，没有记录的分区不在结果中"""
+        conn = sqlite3.connect(self.db_path, timeout=20.0)
+        try:
+            return dict(conn.execute('SELECT partition, max_id FROM feedgrep_partition_ids').fetchall())
+        except sqlite3.OperationalError:
+            return {}
+        finally:
+            conn.close()
+
+    def partitions(self, order: str = 'newest', since: Optional[str] = None,
+                   since_id: Optional[int] = None) -> List[str]:
+        paths = self._all_partitions()
+        if since:
+            # 早于since所在月份的分区不访问，旧条目表的时间范围未知，始终访问
+            since_month = since.replace('-', '')[:6]
+            paths = [path for path in paths if path == self.db_path or self._partition_key(path) >= since_month]
+        if since_id is not None:
+            # 回填的条目写入历史分区，各分区的ID范围可能交叠，按每个分区的最大ID判断；
+            # 没有记录的分区无法判断，照常访问
+            max_ids = self._partition_max_ids()
+            paths = [path for path in paths if max_ids.get(self._partition_key(path), since_id + 1) > since_id]
+        return list(reversed(paths)) if order == 'newest' else paths
+
+    def _prepare_partition(self, conn: sqlite3.Connection, path: str):
+        """创建分区的条目表，自增ID在写入事务中由_begin_write设置"""
+        if path in self._prepared:
+            return
+        create_item_table(conn.cursor())
+        conn.commit()
+        self._prepared.add(path)
+
+    def connect(self, month: Optional[str] = None) -> sqlite3.Connection:
+        """
+        打开分区的写入连接，附加主数据库和前后相邻的分区
+
+        Args:
+            month: 写入的月份（YYYYMM），为空时为当月
+
+        Returns:
+            以该分区为主库的连接
+        """
+        path = self.partition_path(month or time.strftime('%Y%m', time.gmtime()))
+        conn = sqlite3.connect(path, timeout=20.0)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._prepare_partition(conn, path)
+            # 未加库名的元数据表在主库（分区）中不存在，按附加顺序解析到主数据库
+            conn.execute('ATTACH DATABASE ? AS meta', (self.db_path,))
+            paths = self._all_partitions()
+            index = paths.index(path)
+            if index > 0 and paths[index - 1] != self.db_path:
+                conn.execute('ATTACH DATABASE ? AS prev', (paths[index - 1],))
+            if index + 1 < len(paths):
+                conn.execute('ATTACH DATABASE ? AS next', (paths[index + 1],))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def insert_batch(
+        self,
+        items: Iterable,
+        category: str,
+        source_name: str,
+        batch_id: int,
+        on_insert: Optional[Callable[[sqlite3.Cursor, object], None]] = None
+    ) -> List:
+        """
+        按入库时间所在月份把条目写入对应分区，每个分区一个事务
+
+        回填的历史条目写入其发布月份的分区，按时间倒序查询时排在该月份的位置，
+        不会因为写入较晚而排在新条目之前。参数和返回值同SqliteItemStorage.insert_batch
+        """
+        current_month = time.strftime('%Y%m', time.gmtime())
+        groups = {}
+        for item in items:
+            month = item.created_at[:7].replace('-', '') if item.created_at else current_month
+            groups.setdefault(min(month, current_month), []).append(item)
+
+        inserted = []
+        for month in sorted(groups):
+            inserted.extend(self._insert_items(
+                lambda month=month: self.connect(month), groups[month], category, source_name, batch_id, on_insert))
+        return inserted
+
+    def _begin_write(self, conn: sqlite3.Connection):
+        """
+        以BEGIN IMMEDIATE开始写入事务，同时取得分区和附加的主数据库的写锁，
+        所有分区的写入都经主数据库串行；持锁期间把分区的自增序列提升到全局序列，
+        新分区的起始ID和跨月份的写入都不会与其他分区的ID重复
+        """
+        conn.execute('BEGIN IMMEDIATE')
+        seq = conn.execute("SELECT seq FROM meta.feedgrep_item_sequence WHERE name = 'feedgrep_items'").fetchone()[0]
+        conn.execute("UPDATE main.sqlite_sequence SET seq = ? WHERE name = 'feedgrep_items' AND seq < ?", (seq, seq))
+        conn.execute('''
+            INSERT INTO main.sqlite_sequence (name, seq) SELECT 'feedgrep_items', ?
+            WHERE NOT EXISTS (SELECT 1 FROM main.sqlite_sequence WHERE name = 'feedgrep_items')
+        ''', (seq,))
+
+    def _end_write(self, conn: sqlite3.Connection):
+        """在同一事务中把本次分配到的最大ID写回全局序列，并更新分区的最大ID记录"""
+        conn.execute('''
+            UPDATE meta.feedgrep_item_sequence
+            SET seq = MAX(seq, (SELECT seq FROM main.sqlite_sequence WHERE name = 'feedgrep_items'))
+            WHERE name = 'feedgrep_items'
+        ''')
+        path = conn.execute("SELECT file FROM pragma_database_list WHERE name = 'main'").fetchone()[0]
+        conn.execute('''
+            INSERT INTO meta.feedgrep_partition_ids (partition, max_id)
+            SELECT ?, MAX(id) FROM main.feedgrep_items WHERE true HAVING MAX(id) IS NOT NULL
+            ON CONFLICT(partition) DO UPDATE SET max_id = excluded.max_id
+        ''', (self._partition_key(path),))
+
+    def _dedup_schemas(self, conn: sqlite3.Connection) -> List[str]:
+        """
+        查重检查写入的分区和前后相邻的分区，覆盖跨月重复出现的条目；
+        上个分区是启用分区前的主数据库时检查meta
+        """
+        attached = {row[1] for row in conn.execute('PRAGMA database_list')}
+        if 'prev' in attached:
+            schemas = ['main', 'prev']
+        elif self.legacy:
+            schemas = ['main', 'meta']
+        else:
+            schemas = ['main']
+        if 'next' in attached:
+            schemas.append('next')
+        return schemas
+
+    def drop_partitions(self, retention_months: int) -> List[str]:
+        """
+        删除超过保留月数的分区文件，不扫描条目
+
+        Args:
+            retention_months: 保留的月数（含当月），为0时不删除
+
+        Returns:
+            已删除的分区路径
+        """
+        if retention_months <= 0:
+            return []
+        year, month = time.gmtime().tm_year, time.gmtime().tm_mon
+        month_index = year * 12 + month - 1 - (retention_months - 1)
+        oldest_month = f"{month_index // 12:04d}{month_index % 12 + 1:02d}"
+
+        dropped = []
+        for month_key, path in self._list_partitions():
+            if month_key >= oldest_month:
+                break
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            self._prepared.discard(path)
+            dropped.append(path)
+
+        if dropped:
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            try:
+                conn.executemany('DELETE FROM feedgrep_partition_ids WHERE partition = ?',
+                                 [(self._partition_key(path),) for path in dropped])
+                conn.commit()
+            finally:
+                conn.close()
+        return dropped
+
+
+def create_storage(config: Dict, db_path: str) -> SqliteItemStorage:
+    """
+    根据配置创建条目存储
+
+    Args:
+        config: 完整配置，读取storage段
+        db_path: 主数据库路径
+
+    Returns:
+        storage.backend为monthly时返回按月分区存储，否则返回单库存储
+    """
+    backend = (config.get('storage', {}) or {}).get('backend', 'sqlite')
+    if backend == 'monthly':
+        return MonthlyShardedItemStorage(db_path)
+    if backend != 'sqlite':
+        log.warning(f"未知的存储类型 {backend}，使用sqlite")
+    return SqliteItemStorage(db_path)
@@ -1,18 +1,177 @@
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+_TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d  %(message)s'
+_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 所有logger共用一个队列，由后台线程统一写出，调用方只做入队
+_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter(_TEXT_FORMAT, datefmt=_DATE_FORMAT))
+_listener = None
+_listener_lock = threading.Lock()
+
+_level = logging.INFO
+_module_levels = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON，便于日志系统采集"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, _DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+            'file': record.filename,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval: float = 60.0, burst: int = 5, emit=None):
+        """
+        限制重复的警告和错误日志，内容相同的日志在一个时间窗口内最多输出burst条，
+        其余丢弃；窗口结束或进程退出时输出一条汇总，注明被丢弃的条数
+
+        Args:
+            interval: 时间窗口（秒），为0时不限制
+            burst: 每个窗口内相同日志最多输出的条数
+            emit: 输出汇总日志的函数，参数为LogRecord
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.emit = emit
+        self._windows = {}   # (级别, 日志内容) -> [窗口开始时间, 已输出条数, 已丢弃条数, 最后丢弃的日志]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.interval <= 0:
+            return True
+        key = (record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and now - window[0] >= self.interval:
+                self._emit_summary(window)
+                window = None
+            if window is None:
+                self._windows[key] = [now, 1, 0, None]
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            window[3] = record
+            return False
+
+    def flush(self, force: bool = False):
+        """
+        输出已结束窗口的汇总并清理这些窗口
+
+        Args:
+            force: 为True时不论窗口是否结束全部输出，用于进程退出
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                if force or now - window[0] >= self.interval:
+                    del self._windows[key]
+                    self._emit_summary(window)
+
+    def _emit_summary(self, window: list):
+        """窗口内有被丢弃的日志时，以最后一条被丢弃的日志为模板输出汇总"""
+        if not window[2] or self.emit is None:
+            return
+        record = logging.makeLogRecord(window[3].__dict__)
+        record.msg = f"{window[3].getMessage()} (suppressed {window[2]} similar messages in {self.interval:g}s)"
+        record.args = None
+        self.emit(record)
+
+
+_rate_limit_filter = RateLimitFilter(emit=_queue.put)
+
+
+def _start_listener():
+    """首次获取logger时启动后台写日志线程和限流汇总线程，进程退出时写完队列中剩余的日志"""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_queue, _stream_handler, respect_handler_level=False)
+            _listener.start()
+            atexit.register(_listener.stop)
+            # 后注册的先执行：退出时先输出未结束窗口的丢弃汇总，再写完队列
+            atexit.register(_rate_limit_filter.flush, True)
+            threading.Thread(target=_flush_rate_limits, daemon=True).start()
+
+
+def _flush_rate_limits():
+    """每秒输出一次已结束窗口的丢弃汇总"""
+    while True:
+        time.sleep(1)
+        _rate_limit_filter.flush()
+
+
+def configure_logging(config: dict = None):
+    """
+    根据配置文件的logging段设置日志级别和输出格式，对已创建的logger同样生效
+
+    Args:
+        config: logging配置，包括level、modules（按模块设置级别）、json、
+                rate_limit_seconds和rate_limit_burst
+    """
+    global _level, _module_levels
+    config = config or {}
+    _level = logging.getLevelName(str(config.get('level', 'INFO')).upper())
+    if not isinstance(_level, int):
+        _level = logging.INFO
+    _module_levels = {
+        name: logging.getLevelName(str(level).upper())
+        for name, level in (config.get('modules', {}) or {}).items()
+    }
+
+    if config.get('json', False):
+        _stream_handler.setFormatter(JsonFormatter())
+    else:
+        _stream_handler.setFormatter(logging.Formatter(_TEXT_FORMAT, datefmt=_DATE_FORMAT))
+
+    _rate_limit_filter.interval = config.get('rate_limit_seconds', 60)
+    _rate_limit_filter.burst = config.get('rate_limit_burst', 5)
+
+    for name, logger in logging.Logger.manager.loggerDict.items():
+        if isinstance(logger, logging.Logger) and any(isinstance(h, QueueHandler) for h in logger.handlers):
+            logger.setLevel(_level_for(name))
+
+
+def _level_for(name: str) -> int:
+    level = _module_levels.get(name)
+    return level if isinstance(level, int) else _level
+
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.propagate = False  # 1. 切断向上传播
     if not logger.handlers:  # 2. 防止重复
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter(
-            '%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d  %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'))
+        # 只把日志放入队列，格式化和输出由后台线程完成，不阻塞调用方
+        handler = QueueHandler(_queue)
+        handler.addFilter(_rate_limit_filter)
         logger.addHandler(handler)
-        logger.setLevel(logging.DEBUG)  # 3. 按需改级别
+        logger.setLevel(_level_for(name))  # 3. 级别由configure_logging按配置设置
+        _start_listener()
 
     return logger
 
 # 使用
 # log = get_logger(__name__)
-# log.warning('something happened')
\ No newline at end of file
+# log.warning('something happened')
+# configure_logging(config.get('logging'))  # 加载配置后调用
@@ -0,0 +1,56 @@
+import hashlib
+from collections import Counter
+from typing import Iterable, List
+
+# 签名位数及LSH分段数，64位分为8段，汉明距离不超过7的两个签名至少有一段完全相同
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(tokens: Iterable[str]) -> int:
+    """
+    计算词序列的64位SimHash签名
+    
+    Args:
+        tokens: 词序列，重复出现的词按次数加权
+        
+    Returns:
+        无符号64位整数签名
+    """
+    weights = [0] * SIMHASH_BITS
+    for token, count in Counter(tokens).items():
+        h = _token_hash(token)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if (h >> bit) & 1 else -count
+    
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个签名之间的汉明距离"""
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count('1')
+
+
+def bands(signature: int) -> List[int]:
+    """将签名切分为LSH分段，返回每段的值"""
+    return [(signature >> (i * _BAND_BITS)) & _BAND_MASK for i in range(SIMHASH_BANDS)]
+
+
+def to_signed(signature: int) -> int:
+    """无符号签名转为有符号64位整数，便于存入SQLite INTEGER"""
+    return signature - (1 << SIMHASH_BITS) if signature >= 1 << (SIMHASH_BITS - 1) else signature
+
+
+def to_unsigned(value: int) -> int:
+    """SQLite中读出的有符号整数转回无符号签名"""
+    return value & ((1 << SIMHASH_BITS) - 1)
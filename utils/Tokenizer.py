@@ -0,0 +1,75 @@
+import re
+from typing import List, Set
+
+# 连续的中日韩字符，或连续的字母数字
+_TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+(?:[.+#][a-z0-9]+)*')
+_CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    中英文混合分词
+    
+    中文按相邻两字切分（单字保留原样），英文和数字按单词切分并转为小写，
+    不依赖词典，适合标题这类短文本
+    
+    Args:
+        text: 待分词文本
+        
+    Returns:
+        词列表，保持原文顺序
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall((text or '').lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+# 不参与热词统计的常见英文虚词
+STOPWORDS = frozenset([
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by', 'from',
+    'is', 'are', 'was', 'were', 'be', 'it', 'its', 'as', 'this', 'that', 'how', 'what', 'why',
+    'you', 'your', 'we', 'our', 'i', 'my', 'new', 'not', 'no', 'can', 'will', 'has', 'have',
+])
+
+
+def extract_terms(text: str) -> Set[str]:
+    """
+    提取用于热词统计的词和词组
+    
+    在tokenize结果基础上去掉虚词、纯数字、单个字母和单个汉字，
+    并把相邻的两个英文单词组成词组（如"apple vision"）
+    
+    Args:
+        text: 待提取文本
+        
+    Returns:
+        去重后的词和词组集合
+    """
+    terms = set()
+    previous = None
+    for token in tokenize(text):
+        if _CJK_RE.match(token):
+            if len(token) > 1:
+                terms.add(token)
+            previous = None
+            continue
+        if token in STOPWORDS or token.isdigit() or len(token) < 2:
+            previous = None
+            continue
+        terms.add(token)
+        if previous:
+            terms.add(f"{previous} {token}")
+        previous = token
+    return terms
+
+
+# 使用
+# tokenize('OpenAI发布GPT-5模型')  # ['openai', '发布', 'gpt', '5', '模型']
+# extract_terms('Apple Vision Pro发布')  # {'apple', 'vision', 'pro', 'apple vision', 'vision pro', '发布'}